@@ -0,0 +1,45 @@
+import argparse
+from pathlib import Path
+from emulator.AnalysisCache import AnalysisCache, DEFAULT_CACHE_DIRECTORY
+from emulator.Rom import Rom
+from emulator.RomAnalysis import RomAnalysis
+
+ROMS_DIRECTORY = Path("roms")
+
+
+def summary(name: str, analysis: RomAnalysis) -> str:
+    lines = [
+        f"{name} ({analysis.sha1})",
+        f"  size            {len(analysis.data)} bytes",
+        f"  reachable code  {len(analysis.covered_addresses())} bytes in {len(analysis.blocks)} blocks",
+        f"  data regions    {', '.join(f'{start:#05x}-{end - 1:#05x}' for start, end in analysis.data_regions()) or '-'}",
+        f"  indirect jumps  {', '.join(f'{address:#05x}' for address in analysis.indirect_jumps) or '-'}",
+        f"  code stores     {', '.join(f'{address:#05x}' for address in analysis.self_modifying_stores) or '-'}",
+        f"  unknown stores  {', '.join(f'{address:#05x}' for address in analysis.unresolved_stores) or '-'}",
+        "  opcodes used",
+    ]
+    for handler, count in analysis.handler_counts().most_common():
+        lines.append(f"    {handler:<28} {count:>5}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statically analyze roms and cache the results")
+    parser.add_argument("roms", nargs="*", help="roms to analyze, defaults to every rom in the roms directory")
+    parser.add_argument("--disassemble", action="store_true", help="print the disassembly instead of a summary")
+    parser.add_argument("--cache", type=Path, default=DEFAULT_CACHE_DIRECTORY, help="analysis cache directory")
+    args = parser.parse_args()
+
+    cache = AnalysisCache(args.cache)
+    names = args.roms or sorted(path.name for path in ROMS_DIRECTORY.iterdir())
+    for name in names:
+        analysis = cache.load(Rom(ROMS_DIRECTORY / name))
+        if args.disassemble:
+            print(f"; {name} ({analysis.sha1})")
+            print("\n".join(analysis.disassembly()))
+        else:
+            print(summary(name, analysis))
+
+
+if __name__ == "__main__":
+    main()
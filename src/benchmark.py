@@ -0,0 +1,158 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import List, Optional
+from emulator.BlockEngine import BlockEngine
+from emulator.Chip8 import Chip8, SCREEN_WIDTH, SCREEN_HEIGHT
+from emulator.Display import Display
+from emulator.KeyBoard import KeyBoard
+from emulator.Profiler import Profiler
+from emulator.Rom import Rom
+from emulator.Scheduler import Scheduler
+from emulator.ScriptedInput import ScriptedInput, Press
+
+ROMS_DIRECTORY = Path("roms")
+DEFAULT_FRAMES = 600
+DEFAULT_INSTRUCTIONS_PER_FRAME = 100
+PROFILE_FRAMES = 60
+MEMORY_FRAMES = 30
+
+# Held keys cycle through the usual movement and fire keys of the bundled games.
+DEFAULT_SCRIPT_KEYS = [0x4, 0x6, 0x5, 0x8, 0x2, 0x7, 0x9, 0x1]
+DEFAULT_SCRIPT_PERIOD = 20
+DEFAULT_SCRIPT_HOLD = 8
+
+
+def default_script(frames: int) -> List[Press]:
+    presses = []
+    for i, frame in enumerate(range(0, frames, DEFAULT_SCRIPT_PERIOD)):
+        presses.append((frame, DEFAULT_SCRIPT_KEYS[i % len(DEFAULT_SCRIPT_KEYS)], DEFAULT_SCRIPT_HOLD))
+    return presses
+
+
+def create_session(rom: Rom, presses: List[Press], use_blocks: bool, instructions_per_frame: int):
+    keyboard = KeyBoard(ScriptedInput(presses, loop=True))
+    chip8 = Chip8(Display(SCREEN_WIDTH, SCREEN_HEIGHT), keyboard)
+    chip8.load_rom(rom)
+    engine = BlockEngine(chip8) if use_blocks else chip8
+    scheduler = Scheduler(chip8, engine, instructions_per_frame, turbo=True)
+    return chip8, scheduler
+
+
+def measure_speed(rom: Rom, presses: List[Press], frames: int, use_blocks: bool, instructions_per_frame: int) -> dict:
+    chip8, scheduler = create_session(rom, presses, use_blocks, instructions_per_frame)
+    frame_times = []
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame_start = time.perf_counter()
+        scheduler.run_frame()
+        frame_times.append(time.perf_counter() - frame_start)
+    elapsed = time.perf_counter() - start
+
+    frame_times.sort()
+    return {
+        "instructions": scheduler.instructions,
+        "instructions_per_second": scheduler.instructions / elapsed,
+        "frame_time_mean_us": statistics.fmean(frame_times) * 1e6,
+        "frame_time_p95_us": frame_times[int(len(frame_times) * 0.95)] * 1e6,
+        "frame_time_max_us": frame_times[-1] * 1e6,
+        "framebuffer": chip8.display.hash(),
+        "idle_instructions": getattr(scheduler.engine, "idle_instructions", 0),
+    }
+
+
+def measure_handlers(rom: Rom, presses: List[Press], frames: int, instructions_per_frame: int) -> dict:
+    chip8, scheduler = create_session(rom, presses, False, instructions_per_frame)
+    profiler = Profiler(chip8)
+    profiler.attach()
+    scheduler.run(frames)
+    return profiler.to_dict()["handlers"]
+
+
+def measure_peak_memory(rom: Rom, presses: List[Press], frames: int, use_blocks: bool, instructions_per_frame: int) -> int:
+    tracemalloc.start()
+    try:
+        _, scheduler = create_session(rom, presses, use_blocks, instructions_per_frame)
+        scheduler.run(frames)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_rom(rom: Rom, presses: List[Press], args) -> dict:
+    use_blocks = not args.interpreter
+    try:
+        result = measure_speed(rom, presses, args.frames, use_blocks, args.speed)
+        result["handlers"] = measure_handlers(rom, presses, min(args.frames, PROFILE_FRAMES), args.speed)
+        result["peak_memory_bytes"] = measure_peak_memory(rom, presses, min(args.frames, MEMORY_FRAMES), use_blocks, args.speed)
+    except Exception as error:
+        return {"error": f"{type(error).__name__}: {error}"}
+    return result
+
+
+def load_script(path: Optional[Path], frames: int) -> List[Press]:
+    if path is None:
+        return default_script(frames)
+    with path.open() as script:
+        return [tuple(press) for press in json.load(script)]
+
+
+def compare(results: dict, baseline: dict):
+    print(f"{'rom':<10} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results["roms"].items():
+        previous = baseline["roms"].get(name)
+        if previous is None or "error" in previous or "error" in current:
+            continue
+        before = previous["instructions_per_second"]
+        after = current["instructions_per_second"]
+        print(f"{name:<10} {before:>12.0f} {after:>12.0f} {(after - before) / before:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ROM benchmark suite headlessly")
+    parser.add_argument("roms", nargs="*", help="roms to run, defaults to every rom in the roms directory")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="frames to run per rom")
+    parser.add_argument("--speed", type=int, default=DEFAULT_INSTRUCTIONS_PER_FRAME, help="instructions executed per frame")
+    parser.add_argument("--interpreter", action="store_true", help="benchmark the reference interpreter instead of the block engine")
+    parser.add_argument("--script", type=Path, help="JSON list of [frame, key, frames held] key presses")
+    parser.add_argument("--output", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="compare instructions/sec against a previous results file")
+    args = parser.parse_args()
+
+    names = args.roms or sorted(path.name for path in ROMS_DIRECTORY.iterdir())
+    presses = load_script(args.script, args.frames)
+
+    results = {
+        "python": platform.python_version(),
+        "engine": "interpreter" if args.interpreter else "blocks",
+        "frames": args.frames,
+        "instructions_per_frame": args.speed,
+        "roms": {},
+    }
+    for name in names:
+        result = benchmark_rom(Rom(ROMS_DIRECTORY / name), presses, args)
+        results["roms"][name] = result
+        if "error" in result:
+            print(f"{name:<10} {result['error']}", file=sys.stderr)
+        else:
+            print(f"{name:<10} {result['instructions_per_second']:>12.0f} instr/s "
+                  f"{result['frame_time_mean_us']:>9.1f} us/frame "
+                  f"{result['peak_memory_bytes'] / 1024:>8.1f} KiB peak")
+
+    if args.output is not None:
+        with args.output.open("w") as output:
+            json.dump(results, output, indent=4)
+
+    if args.compare is not None:
+        with args.compare.open() as baseline:
+            compare(results, json.load(baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+from emulator.QuirkProfile import DEFAULT_PROFILE, PROFILES
+
+SOURCE_DIRECTORY = Path(__file__).resolve().parent
+TESTS_DIRECTORY = SOURCE_DIRECTORY / "tests"
+GOLDEN_FILE = TESTS_DIRECTORY / "golden.json"
+DEFAULT_FUZZ = 200
+
+
+# Runs one step as its own process and reports whether it passed.
+def run(name: str, command: List[str]) -> bool:
+    print(f"== {name}", flush=True)
+    passed = subprocess.run([sys.executable, *command]).returncode == 0
+    print(f"== {name}: {'passed' if passed else 'FAILED'}", flush=True)
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the unit tests, the lockstep checks and the regression farm")
+    parser.add_argument("--fuzz", type=int, default=DEFAULT_FUZZ, help="random programs each engine and quirk profile is checked on")
+    parser.add_argument("--no-batch", action="store_true", help="skip checking the batch engine, the slowest step")
+    args = parser.parse_args()
+
+    # The harnesses find the roms directory relative to the working
+    # directory, like they do when run by hand.
+    difftest = str(SOURCE_DIRECTORY / "difftest.py")
+    fuzz = ["--fuzz", str(args.fuzz)]
+    steps = [
+        ("unit tests", ["-m", "unittest", "discover", "-s", str(TESTS_DIRECTORY), "-t", str(SOURCE_DIRECTORY)]),
+        ("block engine lockstep", [difftest, *fuzz]),
+    ]
+    # The roms only exercise the handlers of their own profiles, random
+    # programs cover the rest.
+    steps += [
+        (f"block engine lockstep, {name} quirks", [difftest, "--fuzz-only", "--quirks", name, *fuzz])
+        for name in sorted(PROFILES) if name != DEFAULT_PROFILE
+    ]
+    steps.append(("regression farm", [str(SOURCE_DIRECTORY / "regress.py"), str(GOLDEN_FILE)]))
+    if not args.no_batch:
+        steps.append(("batch engine lockstep", [difftest, "--candidate", "batch", *fuzz]))
+
+    failed = [name for name, command in steps if not run(name, command)]
+    if failed:
+        print(f"failed: {', '.join(failed)}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
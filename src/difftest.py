@@ -0,0 +1,97 @@
+import argparse
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from random import Random
+from typing import List
+from benchmark import default_script
+from emulator.Lockstep import Lockstep, CANDIDATES, random_program, random_presses
+from emulator.QuirkProfile import DEFAULT_PROFILE, PROFILES, QuirkProfile
+from emulator.Rom import Rom
+from emulator.ScriptedInput import Press
+
+ROMS_DIRECTORY = Path("roms")
+DEFAULT_INSTRUCTIONS = 100000
+DEFAULT_INSTRUCTIONS_PER_FRAME = 100
+DEFAULT_FUZZ_LENGTH = 64
+DEFAULT_FUZZ_INSTRUCTIONS = 2000
+
+
+# Runs one rom in lockstep and prints how it ended. Returns True when the
+# candidate diverged.
+def check(name: str, rom: Rom, presses: List[Press], args: argparse.Namespace, seed: int, instructions: int) -> bool:
+    profile = PROFILES[args.quirks] if args.quirks else None
+    lockstep = Lockstep(rom, args.candidate, presses, args.speed, seed, profile)
+    divergence = lockstep.run(instructions)
+    if divergence is not None:
+        print(f"{name}: {divergence}")
+        return True
+    if args.verbose:
+        ending = f"both stopped on {lockstep.error}" if lockstep.error else "ok"
+        print(f"{name}: {lockstep.instructions} instructions, {ending}")
+    return False
+
+
+# Roms known to need other quirks than the batch engine has are left out.
+def skipped(path: Path) -> bool:
+    profile = QuirkProfile.for_rom(Rom(path))
+    if profile is PROFILES[DEFAULT_PROFILE]:
+        return False
+    print(f"{path.name}: skipped, needs quirks the batch engine does not have")
+    return True
+
+
+def fuzz(args: argparse.Namespace, directory: Path) -> int:
+    failures = 0
+    for case in range(args.fuzz):
+        seed = args.seed + case
+        random = Random(seed)
+        path = directory / f"fuzz-{seed}.ch8"
+        extended = args.quirks is not None and PROFILES[args.quirks].extended
+        path.write_bytes(random_program(random, args.fuzz_length, extended))
+        presses = random_presses(random, args.fuzz_instructions // args.speed + 1)
+        if check(path.name, Rom(path), presses, args, seed, args.fuzz_instructions):
+            failures += 1
+            if args.save_failures is not None:
+                args.save_failures.mkdir(parents=True, exist_ok=True)
+                shutil.copy(path, args.save_failures)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run an optimized engine in lockstep with the reference interpreter and report where they diverge")
+    parser.add_argument("roms", nargs="*", type=Path, help="roms to check, defaults to every rom in the roms directory")
+    parser.add_argument("--candidate", choices=sorted(CANDIDATES), default="blocks", help="engine checked against the interpreter")
+    parser.add_argument("--instructions", type=int, default=DEFAULT_INSTRUCTIONS, help="instructions to run per rom")
+    parser.add_argument("--speed", type=int, default=DEFAULT_INSTRUCTIONS_PER_FRAME, help="instructions between timer ticks and key changes")
+    parser.add_argument("--quirks", choices=sorted(PROFILES), help="quirk profile of both engines, by default the one known for each rom")
+    parser.add_argument("--seed", type=int, default=0, help="random seed of the machines, and of the first fuzz case")
+    parser.add_argument("--fuzz", type=int, default=0, help="random programs to check after the roms")
+    parser.add_argument("--fuzz-only", action="store_true", help="skip the roms")
+    parser.add_argument("--fuzz-length", type=int, default=DEFAULT_FUZZ_LENGTH, help="instructions per random program")
+    parser.add_argument("--fuzz-instructions", type=int, default=DEFAULT_FUZZ_INSTRUCTIONS, help="instructions to run per random program")
+    parser.add_argument("--save-failures", type=Path, help="copy random programs that diverge into this directory")
+    parser.add_argument("--verbose", action="store_true", help="also print the roms that match")
+    args = parser.parse_args()
+    # The batch engine only implements the default quirks, anything else
+    # would diverge on every rom that depends on them.
+    if args.candidate == "batch" and args.quirks not in (None, DEFAULT_PROFILE):
+        parser.error("the batch engine only runs the default quirk profile")
+
+    paths = [] if args.fuzz_only else args.roms or sorted(ROMS_DIRECTORY.iterdir())
+    if args.candidate == "batch" and args.quirks is None:
+        paths = [path for path in paths if not skipped(path)]
+    presses = default_script(args.instructions // args.speed + 1)
+    failures = sum(check(path.name, Rom(path), presses, args, args.seed, args.instructions) for path in paths)
+
+    with tempfile.TemporaryDirectory() as directory:
+        failures += fuzz(args, Path(directory))
+
+    checked = len(paths) + args.fuzz
+    print(f"{checked - failures}/{checked} programs match the interpreter")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import json
+import logging
+import os
+from pathlib import Path
+from emulator.QuirkProfile import QuirkProfile
+from emulator.Rom import Rom
+from emulator.RomAnalysis import RomAnalysis, ANALYSIS_VERSION
+
+DEFAULT_CACHE_DIRECTORY = Path.home() / ".cache" / "chip8"
+
+
+# Keeps RomAnalysis results on disk, one JSON file per ROM named after the
+# SHA-1 of its content and the quirk profile it was decoded under, so a ROM
+# is only analyzed the first time it is seen and a ROM moved to another
+# profile is analyzed again.
+class AnalysisCache:
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIRECTORY):
+        self.directory = directory
+
+    def path(self, sha1: str, profile: str) -> Path:
+        return self.directory / f"{sha1}-{profile}.json"
+
+    def load(self, rom: Rom) -> RomAnalysis:
+        sha1 = rom.sha1()
+        profile = QuirkProfile.for_sha1(sha1).name
+        path = self.path(sha1, profile)
+        try:
+            with path.open() as cached:
+                values = json.load(cached)
+            if values.get("version") == ANALYSIS_VERSION and values.get("sha1") == sha1 and values.get("profile") == profile:
+                return RomAnalysis.from_dict(values)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as error:
+            logging.warning(f"ignoring unreadable analysis cache {path}: {error}")
+
+        analysis = RomAnalysis.analyze(rom)
+        self.store(analysis)
+        return analysis
+
+    def store(self, analysis: RomAnalysis):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Written aside and renamed so concurrent runs never read half a file.
+            path = self.path(analysis.sha1, analysis.profile.name)
+            temporary = path.with_suffix(f".{os.getpid()}.tmp")
+            with temporary.open("w") as cached:
+                json.dump(analysis.to_dict(), cached)
+            temporary.replace(path)
+        except OSError as error:
+            logging.warning(f"cannot write analysis cache in {self.directory}: {error}")
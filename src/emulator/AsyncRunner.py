@@ -0,0 +1,50 @@
+import asyncio
+from typing import List, Optional
+from emulator.Scheduler import Scheduler, FRAME_RATE, MAX_FRAME_LAG
+
+
+# Drives any number of sessions cooperatively from one event loop. Every
+# frame each session polls its input, emulates and presents in that order,
+# so frame N always runs on the keys polled for frame N and recordings
+# replay exactly. The loop yields between sessions so a slow session never
+# starves the others. Nothing in a frame blocks: a ROM waiting on Fx0A
+# simply idles until a later frame delivers a key.
+class AsyncRunner:
+    def __init__(self, frame_rate: int = FRAME_RATE):
+        self.frame_duration = 1 / frame_rate
+        self.sessions: List[Scheduler] = []
+
+    def add(self, session: Scheduler):
+        self.sessions.append(session)
+
+    def stop(self):
+        for session in self.sessions:
+            session.stop()
+
+    async def run(self, frames: Optional[int] = None):
+        for session in self.sessions:
+            session.running = True
+        try:
+            await self.run_frames(frames)
+        finally:
+            self.stop()
+
+    async def run_frames(self, frames: Optional[int]):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        frame = 0
+
+        while frames is None or frame < frames:
+            sessions = [session for session in self.sessions if session.running]
+            if not sessions:
+                return
+            for session in sessions:
+                session.run_frame()
+                await asyncio.sleep(0)
+            frame += 1
+
+            deadline += self.frame_duration
+            delay = deadline - loop.time()
+            if -delay > MAX_FRAME_LAG * self.frame_duration:
+                deadline = loop.time()
+            await asyncio.sleep(max(delay, 0))
@@ -0,0 +1,32 @@
+from typing import Optional
+from emulator.CpuState import DEFAULT_PITCH
+
+
+# Sounds the buzzer while the sound timer runs. update() is called once per
+# frame and only passes changes on: play() when the buzzer starts or its
+# tone changes, stop() when it ends. Neither may block, audio never holds
+# up emulation.
+class AudioSink:
+    def __init__(self):
+        self.playing = False
+        self.pattern: Optional[bytes] = None
+        self.pitch = DEFAULT_PITCH
+
+    def update(self, sound_timer: int, pattern: Optional[bytes] = None, pitch: int = DEFAULT_PITCH):
+        playing = sound_timer > 0
+        tone_changed = pattern != self.pattern or pitch != self.pitch
+        self.pattern = pattern
+        self.pitch = pitch
+        if playing and (tone_changed or not self.playing):
+            self.play()
+        elif self.playing and not playing:
+            self.stop()
+        self.playing = playing
+
+    # Loops the tone of the current pattern and pitch, in place of whatever
+    # was playing.
+    def play(self):
+        raise NotImplementedError
+
+    def stop(self):
+        raise NotImplementedError
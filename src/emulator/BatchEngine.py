@@ -0,0 +1,294 @@
+import hashlib
+import numpy as np
+from emulator.Chip8 import MAX_MEMORY, NUM_REGISTERS, PROGRAM_COUNTER_START, STACK_SIZE, SCREEN_WIDTH, SCREEN_HEIGHT
+from emulator.Rom import Rom
+from fontset import fontset
+
+NUM_KEYS = 16
+MAX_SPRITE_HEIGHT = 16
+ADDRESS_MASK = MAX_MEMORY - 1
+
+
+# Runs many copies of one ROM in lockstep, one opcode per lane per step.
+# Semantics follow Chip8 under the default quirk profile, except that Cxnn
+# draws from a per-lane xorshift generator, and a lane that hits an unknown
+# opcode, leaves the ROM or breaks its call stack is halted instead of
+# raising. Keys change through set_keys(), so Fx0A sees new presses.
+class BatchEngine:
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.lanes = np.arange(size)
+        self.memory = np.zeros((size, MAX_MEMORY), np.uint8)
+        self.v = np.zeros((size, NUM_REGISTERS), np.uint8)
+        self.index = np.zeros(size, np.int32)
+        self.program_counter = np.full(size, PROGRAM_COUNTER_START, np.int32)
+        self.stack_pointer = np.zeros(size, np.int32)
+        self.stack = np.zeros((size, STACK_SIZE), np.int32)
+        self.delay_timer = np.zeros(size, np.int32)
+        self.sound_timer = np.zeros(size, np.int32)
+        self.framebuffer = np.zeros((size, SCREEN_HEIGHT, SCREEN_WIDTH), np.uint8)
+        self.keys = np.zeros((size, NUM_KEYS), bool)
+        self.last_pressed = np.full(size, -1, np.int32)
+        self.waiting_for_key = np.zeros(size, bool)
+        self.halted = np.zeros(size, bool)
+        self.random_state = np.random.SeedSequence(seed).generate_state(size, np.uint32) | 1
+        self.rom_length = 0
+
+        self.memory[:, :len(fontset)] = fontset
+
+        self.operation_lookup = {
+            0x0: self.clear_return,
+            0x1: self.jump_to_address,
+            0x2: self.call_subroutine,
+            0x3: self.skip_if_reg_equal_val,
+            0x4: self.skip_if_reg_not_equal_val,
+            0x5: self.skip_if_reg_equal_reg,
+            0x6: self.move_value_to_reg,
+            0x7: self.add_value_to_reg,
+            0x8: self.execute_logical_instruction,
+            0x9: self.skip_if_reg_not_equal_reg,
+            0xA: self.load_index_reg_with_value,
+            0xB: self.jump_to_reg0_plus_value,
+            0xC: self.generate_random_number,
+            0xD: self.draw_sprite,
+            0xE: self.keyboard_routines,
+            0xF: self.misc_routines,
+        }
+
+    def load_rom(self, rom: Rom):
+        content = np.frombuffer(rom.load_data(), np.uint8)
+        assert PROGRAM_COUNTER_START + len(content) <= MAX_MEMORY, "Rom does not fit in memory"
+        self.rom_length = len(content)
+        self.memory[:, PROGRAM_COUNTER_START:PROGRAM_COUNTER_START + len(content)] = content
+
+    def run(self, count: int) -> int:
+        for _ in range(count):
+            self.step()
+        return count
+
+    def step(self):
+        out_of_rom = self.program_counter - PROGRAM_COUNTER_START >= self.rom_length
+        self.halted |= out_of_rom
+        lanes = np.flatnonzero(~self.halted)
+        if len(lanes) == 0:
+            return
+
+        pc = self.program_counter[lanes]
+        memory = self.memory
+        opcodes = memory[lanes, pc & ADDRESS_MASK].astype(np.int32) << 8 | memory[lanes, (pc + 1) & ADDRESS_MASK]
+        self.program_counter[lanes] = (pc + 2) & 0xFFFF
+
+        operations = opcodes >> 12
+        first = operations[0]
+        if (operations == first).all():
+            self.operation_lookup[first](lanes, opcodes, pc)
+            return
+
+        for operation in np.unique(operations):
+            selected = operations == operation
+            self.operation_lookup[operation](lanes[selected], opcodes[selected], pc[selected])
+
+    # KeyBoard.set_state for every lane: a key going down becomes the last
+    # pressed one of its lane, the highest when several go down at once.
+    def set_keys(self, keys: np.ndarray):
+        keys = np.asarray(keys, bool)
+        pressed = keys & ~self.keys
+        lanes = pressed.any(axis=1)
+        self.last_pressed[lanes] = NUM_KEYS - 1 - pressed[lanes, ::-1].argmax(axis=1)
+        self.keys[:] = keys
+
+    def update_timers(self):
+        np.subtract(self.delay_timer, 1, out=self.delay_timer, where=self.delay_timer > 0)
+        np.subtract(self.sound_timer, 1, out=self.sound_timer, where=self.sound_timer > 0)
+
+    def random_bytes(self, lanes: np.ndarray) -> np.ndarray:
+        state = self.random_state[lanes]
+        state ^= state << np.uint32(13)
+        state ^= state >> np.uint32(17)
+        state ^= state << np.uint32(5)
+        self.random_state[lanes] = state
+        return (state & 0xFF).astype(np.uint8)
+
+    def framebuffer_bytes(self, lane: int) -> bytes:
+        return np.packbits(self.framebuffer[lane], axis=1).tobytes()
+
+    def hash(self, lane: int) -> str:
+        return hashlib.sha1(self.framebuffer_bytes(lane)).hexdigest()
+
+    def skip_if(self, lanes: np.ndarray, condition: np.ndarray):
+        self.program_counter[lanes] = (self.program_counter[lanes] + 2 * condition) & 0xFFFF
+
+    def clear_return(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        operation = opcodes & 0x00FF
+
+        clear = lanes[operation == 0xE0]
+        self.framebuffer[clear] = 0
+
+        selected = operation == 0xEE
+        returning = lanes[selected]
+        underflow = self.stack_pointer[returning] == 0
+        self.halted[returning[underflow]] = True
+        returning = returning[~underflow]
+        self.stack_pointer[returning] -= 1
+        address = self.stack[returning, self.stack_pointer[returning]]
+        self.program_counter[returning] = (address + 2) & 0xFFFF
+
+    def jump_to_address(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        self.program_counter[lanes] = opcodes & 0x0FFF
+
+    def call_subroutine(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        overflow = self.stack_pointer[lanes] >= STACK_SIZE
+        self.halted[lanes[overflow]] = True
+        lanes, opcodes, pc = lanes[~overflow], opcodes[~overflow], pc[~overflow]
+
+        self.stack[lanes, self.stack_pointer[lanes]] = pc
+        self.stack_pointer[lanes] += 1
+        self.program_counter[lanes] = opcodes & 0x0FFF
+
+    def skip_if_reg_equal_val(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        self.skip_if(lanes, self.v[lanes, (opcodes & 0x0F00) >> 8] == (opcodes & 0x00FF))
+
+    def skip_if_reg_not_equal_val(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        self.skip_if(lanes, self.v[lanes, (opcodes & 0x0F00) >> 8] != (opcodes & 0x00FF))
+
+    def skip_if_reg_equal_reg(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        v = self.v
+        self.skip_if(lanes, v[lanes, (opcodes & 0x0F00) >> 8] == v[lanes, (opcodes & 0x00F0) >> 4])
+
+    def skip_if_reg_not_equal_reg(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        v = self.v
+        self.skip_if(lanes, v[lanes, (opcodes & 0x0F00) >> 8] != v[lanes, (opcodes & 0x00F0) >> 4])
+
+    def move_value_to_reg(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        self.v[lanes, (opcodes & 0x0F00) >> 8] = opcodes & 0x00FF
+
+    def add_value_to_reg(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        registers = (opcodes & 0x0F00) >> 8
+        self.v[lanes, registers] = (self.v[lanes, registers] + (opcodes & 0x00FF)) & 0xFF
+
+    def execute_logical_instruction(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        v = self.v
+        source = (opcodes & 0x0F00) >> 8
+        vx = v[lanes, source].astype(np.int32)
+        vy = v[lanes, (opcodes & 0x00F0) >> 4].astype(np.int32)
+        operation = opcodes & 0x000F
+
+        result = np.select(
+            [operation == 0x0, operation == 0x1, operation == 0x2, operation == 0x3,
+             operation == 0x4, operation == 0x5, operation == 0x6, operation == 0x7, operation == 0xE],
+            [vy, vx | vy, vx & vy, vx ^ vy, vx + vy, vx - vy, vx >> 1, vy - vx, vx << 1],
+        )
+
+        unknown = ~np.isin(operation, (0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7, 0xE))
+        self.halted[lanes[unknown]] = True
+
+        flag = np.select(
+            [operation == 0x4, (operation == 0x5) | (operation == 0x7), operation == 0x6, operation == 0xE],
+            [result >> 8, result >= 0, vx & 0x1, vx >> 7],
+        )
+
+        regular = ~unknown
+        v[lanes[regular], source[regular]] = result[regular] & 0xFF
+
+        # VF is written after the result, so VF as the target register ends
+        # up holding the flag, exactly like Chip8.
+        flagged = np.isin(operation, (0x4, 0x5, 0x6, 0x7, 0xE))
+        v[lanes[flagged], 0xF] = flag[flagged]
+
+    def load_index_reg_with_value(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        self.index[lanes] = opcodes & 0x0FFF
+
+    def jump_to_reg0_plus_value(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        self.program_counter[lanes] = self.v[lanes, 0x0] + (opcodes & 0x0FFF)
+
+    def generate_random_number(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        self.v[lanes, (opcodes & 0x0F00) >> 8] = self.random_bytes(lanes) & (opcodes & 0x00FF)
+
+    def draw_sprite(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        v = self.v
+        start_x = v[lanes, (opcodes & 0x0F00) >> 8].astype(np.int32)
+        start_y = v[lanes, (opcodes & 0x00F0) >> 4].astype(np.int32)
+        n = opcodes & 0x000F
+
+        rows = np.arange(MAX_SPRITE_HEIGHT)
+        addresses = (self.index[lanes, None] + rows) & ADDRESS_MASK
+        sprite = self.memory[lanes[:, None], addresses] * (rows < n[:, None])
+        bits = np.unpackbits(sprite[..., None], axis=-1)
+
+        ys = (start_y[:, None] + rows) % SCREEN_HEIGHT
+        xs = (start_x[:, None] + np.arange(8)) % SCREEN_WIDTH
+        target = (lanes[:, None, None], ys[:, :, None], xs[:, None, :])
+
+        pixels = self.framebuffer[target]
+        v[lanes, 0xF] = (pixels & bits).any(axis=(1, 2))
+        self.framebuffer[target] = pixels ^ bits
+
+    def keyboard_routines(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        operation = opcodes & 0x00FF
+        pressed = self.keys[lanes, self.v[lanes, (opcodes & 0x0F00) >> 8] & 0xF]
+        self.skip_if(lanes, ((operation == 0x9E) & pressed) | ((operation == 0xA1) & ~pressed))
+
+    def misc_routines(self, lanes: np.ndarray, opcodes: np.ndarray, pc: np.ndarray):
+        v = self.v
+        operation = opcodes & 0x00FF
+        registers = (opcodes & 0x0F00) >> 8
+        known = np.zeros(len(lanes), bool)
+
+        def select(value: int):
+            selected = operation == value
+            known[selected] = True
+            return lanes[selected], registers[selected], pc[selected]
+
+        selected, x, _ = select(0x07)
+        v[selected, x] = self.delay_timer[selected]
+
+        # Keys held before the wait started do not count, the instruction
+        # repeats until a new press arrives.
+        selected, x, address = select(0x0A)
+        starting = selected[~self.waiting_for_key[selected]]
+        self.waiting_for_key[starting] = True
+        self.last_pressed[starting] = -1
+        key = self.last_pressed[selected]
+        pressed = key >= 0
+        v[selected[pressed], x[pressed]] = key[pressed]
+        self.waiting_for_key[selected[pressed]] = False
+        self.program_counter[selected[~pressed]] = address[~pressed]
+
+        selected, x, _ = select(0x15)
+        self.delay_timer[selected] = v[selected, x]
+
+        selected, x, _ = select(0x18)
+        self.sound_timer[selected] = v[selected, x]
+
+        selected, x, _ = select(0x1E)
+        self.index[selected] = (self.index[selected] + v[selected, x]) & 0xFFFF
+
+        selected, x, _ = select(0x29)
+        self.index[selected] = (v[selected, x].astype(np.int32) & 0xF) * 5
+
+        selected, x, _ = select(0x33)
+        value = v[selected, x]
+        index = self.index[selected]
+        self.memory[selected, index & ADDRESS_MASK] = value // 100
+        self.memory[selected, (index + 1) & ADDRESS_MASK] = value // 10 % 10
+        self.memory[selected, (index + 2) & ADDRESS_MASK] = value % 10
+
+        selected, x, _ = select(0x55)
+        for register in range(NUM_REGISTERS):
+            storing = x >= register
+            if not storing.any():
+                break
+            lanes_storing = selected[storing]
+            addresses = (self.index[lanes_storing] + register) & ADDRESS_MASK
+            self.memory[lanes_storing, addresses] = v[lanes_storing, register]
+
+        selected, x, _ = select(0x65)
+        for register in range(NUM_REGISTERS):
+            reading = x >= register
+            if not reading.any():
+                break
+            lanes_reading = selected[reading]
+            addresses = (self.index[lanes_reading] + register) & ADDRESS_MASK
+            v[lanes_reading, register] = self.memory[lanes_reading, addresses]
+
+        self.halted[lanes[~known]] = True
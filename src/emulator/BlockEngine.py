@@ -0,0 +1,193 @@
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+from emulator.Chip8 import Chip8, Instruction, PROGRAM_COUNTER_START
+
+MAX_BLOCK_LENGTH = 32
+
+# Instructions that end a block: anything that may move the program counter
+# somewhere other than the next instruction, blocks on input, or writes to
+# memory (and so may rewrite the code that follows it). F000 reads the word
+# that follows it from the program counter, and steps over it.
+TERMINATING_OPERATIONS = { 0x0, 0x1, 0x2, 0x3, 0x4, 0x5, 0x9, 0xB, 0xE }
+TERMINATING_MISC_OPERATIONS = { 0x00, 0x0A, 0x33, 0x55 }
+
+# Instructions that only read memory, timers and keys and only write V, I
+# and the program counter. A loop made of these alone cannot leave until a
+# timer or key changes, which only happens between frames.
+PURE_OPERATIONS = { 0x1, 0x3, 0x4, 0x5, 0x6, 0x7, 0x8, 0x9, 0xA, 0xB, 0xE }
+PURE_MISC_OPERATIONS = { 0x07, 0x1E, 0x29, 0x65 }
+
+
+def is_terminator(opcode: int) -> bool:
+    operation = (opcode & 0xF000) >> 12
+    if operation == 0xF:
+        return (opcode & 0x00FF) in TERMINATING_MISC_OPERATIONS
+    return operation in TERMINATING_OPERATIONS
+
+
+def is_pure(opcode: int) -> bool:
+    operation = (opcode & 0xF000) >> 12
+    if operation == 0xF:
+        return (opcode & 0x00FF) in PURE_MISC_OPERATIONS
+    # XO-CHIP 5xy2 stores registers.
+    if operation == 0x5:
+        return (opcode & 0x000F) != 0x2
+    return operation in PURE_OPERATIONS
+
+
+class Block:
+    def __init__(self, chip8: Chip8, start: int, body: List[Instruction], terminator: Optional[Instruction], pure: bool):
+        self.chip8 = chip8
+        self.start = start
+        # Handlers are bound to the machine and their operands once, when
+        # the block is translated.
+        self.body = tuple(partial(handler, chip8, *operands) for handler, operands in body)
+        self.terminator = partial(terminator[0], chip8, *terminator[1]) if terminator is not None else None
+        self.length = len(body) + (terminator is not None)
+        self.end = start + 2 * self.length
+        self.terminator_address = start + 2 * len(body)
+        self.pure = pure
+
+    def execute(self):
+        cpu = self.chip8.cpu
+
+        for instruction in self.body:
+            instruction()
+
+        if self.terminator is None:
+            cpu.program_counter = self.end
+            return
+
+        cpu.program_counter = self.terminator_address
+        if self.terminator():
+            cpu.program_counter = (cpu.program_counter + 2) & 0xFFFF
+
+
+class BlockEngine:
+    def __init__(self, chip8: Chip8, detect_idle: bool = True):
+        self.chip8 = chip8
+        self.detect_idle = detect_idle
+        self.blocks: Dict[int, Block] = {}
+        self.block_owners: Dict[int, List[int]] = {}
+        self.idle_instructions = 0
+        chip8.memory.add_write_listener(self.invalidate)
+
+    def run(self, count: int) -> int:
+        cpu = self.chip8.cpu
+        if not self.detect_idle:
+            executed = 0
+            while executed < count:
+                executed += self.step()
+                if cpu.waiting_for_key:
+                    return max(executed, count)
+            return executed
+
+        blocks = self.blocks
+        seen: Dict[Tuple[int, bytes, int], int] = {}
+        previous = -1
+        executed = 0
+
+        while executed < count:
+            program_counter = cpu.program_counter
+            block = blocks.get(program_counter)
+            if block is None:
+                block = self.translate(program_counter)
+
+            # Every loop takes a backward branch, so comparing the machine
+            # state at backward branch targets is enough to see it repeat.
+            # Whole turns of the loop are skipped, the remainder still runs
+            # so the engine ends the frame exactly where it would have.
+            if not block.pure:
+                if seen:
+                    seen.clear()
+            elif program_counter <= previous:
+                signature = (program_counter, bytes(cpu.v), cpu.index)
+                first_seen = seen.get(signature)
+                if first_seen is None:
+                    seen[signature] = executed
+                else:
+                    cycle = executed - first_seen
+                    skipped = (count - executed) // cycle * cycle
+                    executed += skipped
+                    self.idle_instructions += skipped
+                    seen.clear()
+                    continue
+
+            previous = program_counter
+            block.execute()
+            executed += block.length
+
+            # A block waiting on Fx0A cannot make progress before the next
+            # frame, the rest of the budget is idle.
+            if cpu.waiting_for_key:
+                if executed < count:
+                    self.idle_instructions += count - executed
+                    executed = count
+                break
+        return executed
+
+    def step(self) -> int:
+        program_counter = self.chip8.cpu.program_counter
+        block = self.blocks.get(program_counter)
+        if block is None:
+            block = self.translate(program_counter)
+
+        block.execute()
+        return block.length
+
+    # Translates ahead of time the blocks starting at the given addresses,
+    # typically the block leaders found by RomAnalysis.
+    def pretranslate(self, addresses: Iterable[int]) -> int:
+        translated = 0
+        for address in addresses:
+            if address not in self.blocks and address - PROGRAM_COUNTER_START < self.chip8.rom_length:
+                self.translate(address)
+                translated += 1
+        return translated
+
+    def translate(self, start: int) -> Block:
+        chip8 = self.chip8
+        rom_end = PROGRAM_COUNTER_START + chip8.rom_length
+        assert start - PROGRAM_COUNTER_START < chip8.rom_length
+
+        body: List[Instruction] = []
+        terminator = None
+        pure = True
+        address = start
+
+        while address < rom_end and len(body) < MAX_BLOCK_LENGTH:
+            opcode = chip8.memory.get(address) << 8 | chip8.memory.get(address + 1)
+            instruction = chip8.decode_table[opcode]
+            pure = pure and is_pure(opcode)
+
+            # Unknown opcodes end the block too, so the program counter
+            # points at them when they raise, exactly like the interpreter.
+            if is_terminator(opcode) or instruction[0] is Chip8.unknown_opcode:
+                terminator = instruction
+                break
+            body.append(instruction)
+            address += 2
+
+        block = Block(chip8, start, body, terminator, pure)
+        self.blocks[start] = block
+        for position in range(start, block.end):
+            self.block_owners.setdefault(position, []).append(start)
+        return block
+
+    def invalidate(self, position: int, length: int):
+        block_owners = self.block_owners
+        for address in range(position, position + length):
+            owners = block_owners.pop(address, None)
+            if owners is None:
+                continue
+            for start in owners:
+                block = self.blocks.pop(start, None)
+                if block is None:
+                    continue
+                # The other addresses of the block no longer belong to it.
+                for other in range(block.start, block.end):
+                    others = block_owners.get(other)
+                    if others is not None and start in others:
+                        others.remove(start)
+                        if not others:
+                            del block_owners[other]
@@ -1,457 +1,702 @@
 import logging
-from random import randint
-from typing import Callable
+from random import Random
+from typing import Callable, Dict, List, Optional, Tuple
 from emulator.Display import Display
 from emulator.Memory import Memory
 from emulator.Rom import Rom
-from emulator.Register import Register
-from emulator.RegisterContainer import RegisterContainer
+from emulator.CpuState import CpuState, PATTERN_SIZE
 from emulator.KeyBoard import KeyBoard
-from fontset import fontset
+from emulator.QuirkProfile import QuirkProfile, PROFILES, DEFAULT_PROFILE
+from fontset import fontset, big_fontset
 
 MAX_MEMORY = 4096
+XO_MEMORY = 0x10000
 NUM_REGISTERS = 16
-STACK_POINTER_START = 0x52
+STACK_SIZE = 16
 PROGRAM_COUNTER_START = 0x200
 
 SCREEN_WIDTH = 64
 SCREEN_HEIGHT = 32
+HIRES_WIDTH = 128
+HIRES_HEIGHT = 64
+XO_PLANES = 2
+
+# The large font follows the small one, which takes 80 bytes.
+BIG_FONT_ADDRESS = 0x50
+BIG_FONT_HEIGHT = 10
+# Pixels 00FB and 00FC scroll by.
+SCROLL_DISTANCE = 4
+
+# Spreads each bit of a byte over two, for drawing low resolution sprites
+# doubled on the high resolution display.
+DOUBLED = [sum(((value >> bit) & 1) * 3 << 2 * bit for bit in range(8)) for value in range(256)]
+
+# A decoded instruction: the unbound handler and the operands it takes.
+Instruction = Tuple[Callable[..., bool], Tuple[int, ...]]
+
+
+class UnknownOpcodeError(Exception):
+    pass
 
 
 class Chip8:
-    def __init__(self):
+    # Without a quirk profile the one for the ROM is chosen when it is loaded.
+    def __init__(self, display: Display, keyboard: Optional[KeyBoard] = None, seed: Optional[int] = None, profile: Optional[QuirkProfile] = None):
         self.memory = Memory(MAX_MEMORY)
-        self.keyboard = KeyBoard()
-        self.display = Display(SCREEN_WIDTH, SCREEN_HEIGHT, 10)
-        self.registers = RegisterContainer(NUM_REGISTERS, PROGRAM_COUNTER_START, STACK_POINTER_START)
+        self.keyboard = keyboard if keyboard is not None else KeyBoard()
+        self.display = display
+        self.cpu = CpuState(NUM_REGISTERS, PROGRAM_COUNTER_START, STACK_SIZE)
         self.rom_length = 0
+        # Seeding makes Cxnn, and so whole runs, reproducible.
+        self.random = Random(seed)
+        self.fixed_profile = profile is not None
+        self.set_profile(profile if profile is not None else PROFILES[DEFAULT_PROFILE])
+
+    # Extended profiles change the size of memory and of the display, both
+    # start out cleared when they do.
+    def set_profile(self, profile: QuirkProfile):
+        self.profile = profile
+        self.decode_table = decode_table(profile)
+        memory_size = XO_MEMORY if profile.xo else MAX_MEMORY
+        if len(self.memory) != memory_size:
+            self.memory.resize(memory_size)
+        geometry = display_geometry(profile)
+        if (self.display.get_width(), self.display.get_height(), self.display.num_planes) != geometry:
+            self.display.resize(*geometry)
         self.load_fontset()
 
-        self.operation_lookup = {
-            0x0: self.clear_return,                  # 0nnn - subfunctions
-            0x1: self.jump_to_address,               # 1nnn
-            0x2: self.call_subroutine,               # 2nnn
-            0x3: self.skip_if_reg_equal_val,         # 3xnn
-            0x4: self.skip_if_reg_not_equal_val,     # 4xnn
-            0x5: self.skip_if_reg_equal_reg,         # 5xy0
-            0x6: self.move_value_to_reg,             # 6xnn
-            0x7: self.add_value_to_reg,              # 7xnn
-            0x8: self.execute_logical_instruction,   # 8nnn - subfunctions
-            0x9: self.skip_if_reg_not_equal_reg,     # 9xy0
-            0xA: self.load_index_reg_with_value,     # Annn
-            0xB: self.jump_to_reg0_plus_value,       # Bnnn
-            0xC: self.generate_random_number,        # Cxnn
-            0xD: self.draw_sprite,                   # Dxyn
-            0xE: self.keyboard_routines,             # Ennn - subfunctions
-            0xF: self.misc_routines,                 # Fnnn - subfunctions
-        }
-
-        self.logical_operation_lookup = {
-            0x0: self.move_reg_into_reg,             # 8xy0
-            0x1: self.logical_or,                    # 8xy1
-            0x2: self.logical_and,                   # 8xy2
-            0x3: self.exclusive_or,                  # 8xy3
-            0x4: self.add_reg_to_reg,                # 8xy4
-            0x5: self.subtract_reg_from_reg,         # 8xy5
-            0x6: self.right_shift_reg,               # 8xy6
-            0x7: self.subtract_reg_from_reg1,        # 8xy7
-            0xE: self.left_shift_reg,                # 8xyE
-        }
-
-        self.misc_operation_lookup = {
-            0x07: self.move_delay_timer_into_reg,    # Fx07
-            0x0A: self.wait_for_keypress,            # Fx0A
-            0x15: self.move_reg_into_delay_timer,    # Fx15
-            0x18: self.move_reg_into_sound_timer,    # Fx18
-            0x1E: self.add_reg_into_index,           # Fx1E
-            0x29: self.load_index_with_reg_sprite,   # Fx29
-            0x33: self.store_bcd_in_memory,          # Fx33
-            0x55: self.store_regs_in_memory,         # Fx55
-            0x65: self.read_regs_from_memory,        # Fx65
-        }
-
     def load_rom(self, rom: Rom):
         logging.debug("loading rom")
-        content = rom.load_data()
-        self.rom_length = len(content)
-        for i, data in enumerate(content):
-            self.memory.set(PROGRAM_COUNTER_START + i, data)
+        if not self.fixed_profile:
+            self.set_profile(QuirkProfile.for_rom(rom))
+        self.rom_length = rom.read_into(self.memory.view[PROGRAM_COUNTER_START:])
+        self.memory.notify_write(PROGRAM_COUNTER_START, self.rom_length)
 
         logging.debug(self.memory)
     
     def step(self):
-        assert self.registers.program_counter.get() - 0x200 < self.rom_length
-
-        opcode = self.fetch_opcode()
-        opcode_action = self.decode_opcode(opcode)
-        must_go_to_next_instruction = self.execute_action(opcode_action, opcode)
-        if must_go_to_next_instruction:
-            self.next_instruction()
+        cpu = self.cpu
+        counter = cpu.program_counter
+        assert counter - PROGRAM_COUNTER_START < self.rom_length
+
+        memory = self.memory.memory
+        handler, operands = self.decode_table[memory[counter] << 8 | memory[counter + 1]]
+        if handler(self, *operands):
+            cpu.program_counter = (cpu.program_counter + 2) & 0xFFFF
+
+    def run(self, count: int) -> int:
+        cpu = self.cpu
+        for _ in range(count):
+            self.step()
+            # Nothing can happen until the next frame delivers a key, the
+            # rest of the budget is spent waiting.
+            if cpu.waiting_for_key:
+                break
+        return count
 
     def fetch_opcode(self) -> int:
-        counter = self.registers.program_counter.get()
+        counter = self.cpu.program_counter
         return self.memory.get(counter) << 8 | self.memory.get(counter + 1)
 
-    def decode_opcode(self, opcode: int) -> Callable[[int], bool]:
-        operation = (opcode & 0xF000) >> 12
-        return self.operation_lookup[operation]
-
-    def execute_action(self, opcode_action: Callable[[int], bool], opcode) -> bool:
-        return opcode_action(opcode)
-
     def update_timers(self):
-        logging.debug("timers updated")
-        self.update_timer(self.registers.delay_timer)
-        self.update_timer(self.registers.sound_timer)
-
-    def update_timer(self, register: Register):
-        if register.get() > 0:
-            register.decrement()
+        cpu = self.cpu
+        if cpu.delay_timer > 0:
+            cpu.delay_timer -= 1
+        if cpu.sound_timer > 0:
+            cpu.sound_timer -= 1
         
     def next_instruction(self):
-        logging.debug("next instruction")
-        self.registers.program_counter.add(2)
+        self.cpu.program_counter = (self.cpu.program_counter + 2) & 0xFFFF
+
+    # XO-CHIP skips step over both words of F000 nnnn.
+    def next_instruction_long(self):
+        cpu = self.cpu
+        cpu.program_counter = (cpu.program_counter + 2) & 0xFFFF
+        if self.fetch_opcode() == 0xF000:
+            cpu.program_counter = (cpu.program_counter + 2) & 0xFFFF
 
     def load_fontset(self):
         logging.debug("loading fontset")
-        for i, font_value in enumerate(fontset):
-            self.memory.set(i, font_value)
+        big_font = big_fontset if self.profile.extended else [0] * len(big_fontset)
+        self.memory.write(0, bytes(fontset + big_font))
 
-    def clear_return(self, opcode: int) -> bool:
-        operation = opcode & 0x00FF
+    def clear_screen(self) -> bool:
+        self.display.clear(self.cpu.plane_mask)
+        return True
 
-        match operation:
-            case 0x00E0:
-                logging.debug(hex(opcode), "clear display")
-                self.display.clear()
-                return True
+    def scroll_down(self, rows: int) -> bool:
+        cpu = self.cpu
+        self.display.scroll_down(rows if cpu.hires else rows * 2, cpu.plane_mask)
+        return True
 
-            case 0x00EE:
-                return self.return_from_subroutine(opcode)
+    def scroll_up(self, rows: int) -> bool:
+        cpu = self.cpu
+        self.display.scroll_up(rows if cpu.hires else rows * 2, cpu.plane_mask)
         return True
 
-    def return_from_subroutine(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " return from subroutine")
-        stack_pointer_register = self.registers.stack_pointer
-        program_counter_register = self.registers.program_counter
+    def scroll_right(self) -> bool:
+        cpu = self.cpu
+        self.display.scroll_right(SCROLL_DISTANCE if cpu.hires else SCROLL_DISTANCE * 2, cpu.plane_mask)
+        return True
 
-        stack_pointer_register.decrement()
-        address = self.memory.get(stack_pointer_register.get())
-        program_counter_register.set(address)
+    def scroll_left(self) -> bool:
+        cpu = self.cpu
+        self.display.scroll_left(SCROLL_DISTANCE if cpu.hires else SCROLL_DISTANCE * 2, cpu.plane_mask)
         return True
 
-    def jump_to_address(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " jump to address")
-        address = opcode & 0x0FFF
-        self.registers.program_counter.set(address)
+    # 00FD ends the program, the machine spins on it from then on.
+    def exit_interpreter(self) -> bool:
         return False
 
-    def call_subroutine(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " call subroutine")
-        stack_pointer_register = self.registers.stack_pointer
-        program_counter_register = self.registers.program_counter
-        address = opcode & 0x0FFF
+    def low_resolution(self) -> bool:
+        self.cpu.hires = False
+        self.display.clear()
+        return True
 
-        self.memory.set(stack_pointer_register.get(), program_counter_register.get())
-        stack_pointer_register.increment()
-        program_counter_register.set(address)
+    def high_resolution(self) -> bool:
+        self.cpu.hires = True
+        self.display.clear()
+        return True
+
+    def return_from_subroutine(self) -> bool:
+        self.cpu.program_counter = self.cpu.pop()
+        return True
+
+    # 0nnn calls a machine code routine of the original interpreter, which
+    # does not exist here.
+    def system_call(self, address: int) -> bool:
+        return True
+
+    def jump_to_address(self, address: int) -> bool:
+        self.cpu.program_counter = address
         return False
 
-    def skip_if_reg_equal_val(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " skip if reg equal val")
-        register = (opcode & 0x0F00) >> 8
-        value = opcode & 0x00FF
-        
-        if self.registers.general_purpose[register].get() == value:
+    def call_subroutine(self, address: int) -> bool:
+        self.cpu.push(self.cpu.program_counter)
+        self.cpu.program_counter = address
+        return False
+
+    def skip_if_reg_equal_val(self, register: int, value: int) -> bool:
+        if self.cpu.v[register] == value:
             self.next_instruction()
         return True
 
-    def skip_if_reg_not_equal_val(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " skip if reg not equal val")
-        register = (opcode & 0x0F00) >> 8
-        value = opcode & 0x00FF
-        
-        if self.registers.general_purpose[register].get() != value:
+    def skip_if_reg_not_equal_val(self, register: int, value: int) -> bool:
+        if self.cpu.v[register] != value:
             self.next_instruction()
         return True
 
-    def skip_if_reg_equal_reg(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " skip if reg equal reg")
-        general_registers = self.registers.general_purpose
-        register1 = (opcode & 0x0F00) >> 8
-        register2 = (opcode & 0x00F0) >> 4
-
-        if general_registers[register1].get() == general_registers[register2].get():
+    def skip_if_reg_equal_reg(self, register1: int, register2: int) -> bool:
+        v = self.cpu.v
+        if v[register1] == v[register2]:
             self.next_instruction()
         return True
 
-    def move_value_to_reg(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " move value to reg")
-        register = (opcode & 0x0F00) >> 8
-        value = opcode & 0x00FF
-        self.registers.general_purpose[register].set(value)
+    def move_value_to_reg(self, register: int, value: int) -> bool:
+        self.cpu.v[register] = value
         return True
 
-    def add_value_to_reg(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " add value to reg")
-        register = (opcode & 0x0F00) >> 8
-        value = opcode & 0x00FF
-        self.registers.general_purpose[register].add(value)
+    def add_value_to_reg(self, register: int, value: int) -> bool:
+        v = self.cpu.v
+        v[register] = (v[register] + value) & 0xFF
         return True
 
-    def execute_logical_instruction(self, opcode: int) -> bool:
-        operation = opcode & 0x000F
-        executable_operation = self.logical_operation_lookup[operation]
-        executable_operation(opcode)
+    def move_reg_into_reg(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        v[source] = v[target]
         return True
 
-    def move_reg_into_reg(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " move reg into reg")
-        general_registers = self.registers.general_purpose
-        source = (opcode & 0x0F00) >> 8
-        target = (opcode & 0x00F0) >> 4
+    def logical_or(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        v[source] |= v[target]
+        return True
 
-        general_registers[source].set(general_registers[target].get())
+    def logical_or_reset_flag(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        v[source] |= v[target]
+        v[0xF] = 0
         return True
-    
-    def logical_or(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " logical or")
-        general_registers = self.registers.general_purpose
-        source = (opcode & 0x0F00) >> 8
-        target = (opcode & 0x00F0) >> 4
 
-        result = general_registers[source].get() | general_registers[target].get()
-        general_registers[source].set(result)
+    def logical_and(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        v[source] &= v[target]
         return True
 
-    def logical_and(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " logical and")
-        general_registers = self.registers.general_purpose
-        source = (opcode & 0x0F00) >> 8
-        target = (opcode & 0x00F0) >> 4
+    def logical_and_reset_flag(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        v[source] &= v[target]
+        v[0xF] = 0
+        return True
 
-        result = general_registers[source].get() & general_registers[target].get()
-        general_registers[source].set(result)
+    def exclusive_or(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        v[source] ^= v[target]
         return True
 
-    def exclusive_or(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " exclusive or")
-        general_registers = self.registers.general_purpose
-        source = (opcode & 0x0F00) >> 8
-        target = (opcode & 0x00F0) >> 4
+    def exclusive_or_reset_flag(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        v[source] ^= v[target]
+        v[0xF] = 0
+        return True
 
-        result = general_registers[source].get() ^ general_registers[target].get()
-        general_registers[source].set(result)
+    def add_reg_to_reg(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        result = v[source] + v[target]
+        v[source] = result & 0xFF
+        v[0xF] = result >> 8
         return True
 
-    def add_reg_to_reg(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " and reg to reg")
-        general_registers = self.registers.general_purpose
-        source = (opcode & 0x0F00) >> 8
-        target = (opcode & 0x00F0) >> 4
+    def subtract_reg_from_reg(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        result = v[source] - v[target]
+        v[source] = result & 0xFF
+        v[0xF] = result >= 0
+        return True
 
-        result = general_registers[source].get() + general_registers[target].get()
-        general_registers[source].set(result)
-        general_registers[0xF].set(int(general_registers[source].get_overflow_flag())) 
+    def right_shift_reg(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        value = v[source]
+        v[source] = value >> 1
+        v[0xF] = value & 0x1
         return True
 
-    def subtract_reg_from_reg(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " substract reg from reg")
-        general_registers = self.registers.general_purpose
-        source = (opcode & 0x0F00) >> 8
-        target = (opcode & 0x00F0) >> 4
+    def right_shift_reg_y(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        value = v[target]
+        v[source] = value >> 1
+        v[0xF] = value & 0x1
+        return True
 
-        result = general_registers[source].get() - general_registers[target].get()
-        general_registers[source].set(result)
-        general_registers[0xF].set(int(not general_registers[source].get_borrow_flag())) 
+    def subtract_reg_from_reg1(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        result = v[target] - v[source]
+        v[source] = result & 0xFF
+        v[0xF] = result >= 0
         return True
 
-    def right_shift_reg(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " right shift reg")
-        general_registers = self.registers.general_purpose
-        source = (opcode & 0x0F00) >> 8
+    def left_shift_reg(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        value = v[source]
+        v[source] = (value << 1) & 0xFF
+        v[0xF] = value >> 7
+        return True
+
+    def left_shift_reg_y(self, source: int, target: int) -> bool:
+        v = self.cpu.v
+        value = v[target]
+        v[source] = (value << 1) & 0xFF
+        v[0xF] = value >> 7
+        return True
+
+    # 5xy2 and 5xy3 save and load Vx to Vy, in descending order when x is
+    # the larger, and leave I alone.
+    def store_reg_range_in_memory(self, first: int, last: int) -> bool:
+        v = self.cpu.v
+        registers = v[first:last + 1] if first <= last else v[last:first + 1][::-1]
+        self.memory.write(self.cpu.index, registers)
+        return True
 
-        least_significant_bit = general_registers[source].get() & 0x1
-        general_registers[0xF].set(least_significant_bit) 
-        general_registers[source].set(general_registers[source].get() >> 1)
+    def read_reg_range_from_memory(self, first: int, last: int) -> bool:
+        v = self.cpu.v
+        data = self.memory.read(self.cpu.index, abs(last - first) + 1)
+        if first <= last:
+            v[first:last + 1] = data
+        else:
+            v[last:first + 1] = bytes(data)[::-1]
         return True
 
-    def subtract_reg_from_reg1(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " substract reg from reg1")
-        general_registers = self.registers.general_purpose
-        source = (opcode & 0x0F00) >> 8
-        target = (opcode & 0x00F0) >> 4
+    def skip_if_reg_not_equal_reg(self, register1: int, register2: int) -> bool:
+        v = self.cpu.v
+        if v[register1] != v[register2]:
+            self.next_instruction()
+        return True
 
-        result = general_registers[target].get() - general_registers[source].get()
-        general_registers[source].set(result)
-        general_registers[0xF].set(int(not general_registers[source].get_borrow_flag())) 
+    def load_index_reg_with_value(self, value: int) -> bool:
+        self.cpu.index = value
         return True
 
-    def left_shift_reg(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " left shift reg")
-        general_registers = self.registers.general_purpose
-        source = (opcode & 0x0F00) >> 8
+    def jump_to_reg0_plus_value(self, address: int) -> bool:
+        self.cpu.program_counter = self.cpu.v[0x0] + address
+        return False
+
+    def jump_to_regx_plus_value(self, register: int, address: int) -> bool:
+        self.cpu.program_counter = self.cpu.v[register] + address
+        return False
+
+    def generate_random_number(self, register: int, value: int) -> bool:
+        self.cpu.v[register] = self.random.randint(0, 255) & value
+        return True
 
-        most_significant_bit = (general_registers[source].get() & 0x80) >> 8
-        general_registers[0xF].set(most_significant_bit)
-        general_registers[source].set(general_registers[source].get() << 1)
+    def draw_sprite(self, register_x: int, register_y: int, n: int) -> bool:
+        v = self.cpu.v
+        sprite = self.memory.read(self.cpu.index, n)
+        v[0xF] = self.display.draw_sprite(v[register_x], v[register_y], sprite)
         return True
 
-    def skip_if_reg_not_equal_reg(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " skip if reg not equal reg")
-        general_registers = self.registers.general_purpose
-        register1 = (opcode & 0x0F00) >> 8
-        register2 = (opcode & 0x00F0) >> 4
+    # Dxy0 draws 16x16 sprites of two bytes a line. Every selected plane
+    # draws its own copy of the sprite, read from I onwards in plane order.
+    # Low resolution draws every pixel as a 2x2 block.
+    def draw_sprite_extended(self, register_x: int, register_y: int, n: int) -> bool:
+        cpu = self.cpu
+        v = cpu.v
+        display = self.display
+        x = v[register_x]
+        y = v[register_y]
+        line_width = 16 if n == 0 else 8
+        length = 32 if n == 0 else n
+        if not cpu.hires:
+            x *= 2
+            y *= 2
+        address = cpu.index
+        collision = False
+
+        for plane in range(display.num_planes):
+            if not cpu.plane_mask >> plane & 1:
+                continue
+            sprite = self.memory.read(address, length)
+            address += length
+            if n == 0:
+                sprite = [sprite[i] << 8 | sprite[i + 1] for i in range(0, length, 2)]
+            if cpu.hires:
+                collision |= display.draw_sprite(x, y, sprite, line_width, plane)
+            else:
+                lines = [DOUBLED[line >> 8] << 16 | DOUBLED[line & 0xFF] for line in sprite]
+                doubled = [line for line in lines for _ in range(2)]
+                collision |= display.draw_sprite(x, y, doubled, line_width * 2, plane)
+
+        v[0xF] = collision
+        return True
 
-        if general_registers[register1].get() != general_registers[register2].get():
+    def skip_if_key_pressed(self, register: int) -> bool:
+        if self.keyboard.key_pressed(self.cpu.v[register]):
             self.next_instruction()
         return True
 
-    def load_index_reg_with_value(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " load index reg with value")
-        value = opcode & 0x0FFF
-        self.registers.index.set(value)
+    def skip_if_key_not_pressed(self, register: int) -> bool:
+        if not self.keyboard.key_pressed(self.cpu.v[register]):
+            self.next_instruction()
         return True
 
-    def jump_to_reg0_plus_value(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " jump to reg0 plus value")
-        address = opcode & 0x0FFF
-        destination = self.registers.general_purpose[0x0].get() + address 
-        self.registers.program_counter.set(destination)
-        return False
+    # The skips of the XO-CHIP profile.
+    def skip_long_if_reg_equal_val(self, register: int, value: int) -> bool:
+        if self.cpu.v[register] == value:
+            self.next_instruction_long()
+        return True
 
-    def generate_random_number(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " generate random number")
-        register = (opcode & 0x0F00) >> 8
-        value = opcode & 0x00FF
-        result = randint(0, 255) & value
+    def skip_long_if_reg_not_equal_val(self, register: int, value: int) -> bool:
+        if self.cpu.v[register] != value:
+            self.next_instruction_long()
+        return True
+
+    def skip_long_if_reg_equal_reg(self, register1: int, register2: int) -> bool:
+        v = self.cpu.v
+        if v[register1] == v[register2]:
+            self.next_instruction_long()
+        return True
 
-        self.registers.general_purpose[register].set(result)
+    def skip_long_if_reg_not_equal_reg(self, register1: int, register2: int) -> bool:
+        v = self.cpu.v
+        if v[register1] != v[register2]:
+            self.next_instruction_long()
         return True
 
-    def draw_sprite(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " draw sprite")
-        general_registers = self.registers.general_purpose
+    def skip_long_if_key_pressed(self, register: int) -> bool:
+        if self.keyboard.key_pressed(self.cpu.v[register]):
+            self.next_instruction_long()
+        return True
 
-        register_x = (opcode & 0x0F00) >> 8
-        register_y = (opcode & 0x00F0) >> 4
-        n = opcode & 0x000F
+    def skip_long_if_key_not_pressed(self, register: int) -> bool:
+        if not self.keyboard.key_pressed(self.cpu.v[register]):
+            self.next_instruction_long()
+        return True
 
-        start_x = general_registers[register_x].get()
-        start_y = general_registers[register_y].get()
+    # Unassigned Ennn opcodes have always been ignored.
+    def no_operation(self) -> bool:
+        return True
 
-        general_registers[0xF].set(0)
+    def move_delay_timer_into_reg(self, register: int) -> bool:
+        self.cpu.v[register] = self.cpu.delay_timer
+        return True
 
-        for j in range(n):
-            y = (start_y + j) % self.display.get_height()
-            color_byte = self.memory.get(self.registers.index.get() + j)
+    def wait_for_keypress(self, register: int) -> bool:
+        cpu = self.cpu
 
-            for i in range(8):
-                x = (start_x + i) % self.display.get_width()
-                color = (color_byte >> (7 - i)) & 1
-                pixel = self.display.get_pixel(x, y)
+        # Keys held before the instruction was reached do not count, the
+        # instruction repeats until a new press arrives.
+        if not cpu.waiting_for_key:
+            cpu.waiting_for_key = True
+            self.keyboard.last_pressed = None
+        if self.keyboard.last_pressed is None:
+            return False
 
-                if color and pixel:
-                    general_registers[0xF].set(1)
+        cpu.v[register] = self.keyboard.last_pressed
+        cpu.waiting_for_key = False
+        return True
 
-                self.display.set_pixel(x, y, pixel ^ color)
+    def move_reg_into_delay_timer(self, register: int) -> bool:
+        self.cpu.delay_timer = self.cpu.v[register]
+        return True
 
-        self.display.update()
+    def move_reg_into_sound_timer(self, register: int) -> bool:
+        self.cpu.sound_timer = self.cpu.v[register]
         return True
 
-    def keyboard_routines(self, opcode: int) -> bool:
-        operation = opcode & 0x00FF
-        register = (opcode & 0x0F00) >> 8
+    def add_reg_into_index(self, register: int) -> bool:
+        self.cpu.index = (self.cpu.index + self.cpu.v[register]) & 0xFFFF
+        return True
 
-        key = self.registers.general_purpose[register].get()
-        
-        match operation:
-            case 0x9E:
-                logging.debug(hex(opcode) + " skip next instruction if key pressed")
-                if self.keyboard.key_pressed(key):
-                    self.next_instruction()
-            case 0xA1:
-                logging.debug(hex(opcode) + " skip next instruction if key not pressed")
-                if not self.keyboard.key_pressed(key):
-                    self.next_instruction()
+    def load_index_with_reg_sprite(self, register: int) -> bool:
+        self.cpu.index = (self.cpu.v[register] & 0xF) * 5
         return True
-        
-    def misc_routines(self, opcode: int) -> bool:
-        operation = opcode & 0x00FF
-        executable_operation = self.misc_operation_lookup[operation]
-        return executable_operation(opcode)
 
-    def move_delay_timer_into_reg(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " move delay timer into reg")
-        register = (opcode & 0x0F00) >> 8
-        delay_timer = self.registers.delay_timer.get()
-        self.registers.general_purpose[register].set(delay_timer)
+    def load_index_with_reg_big_sprite(self, register: int) -> bool:
+        self.cpu.index = BIG_FONT_ADDRESS + (self.cpu.v[register] & 0xF) * BIG_FONT_HEIGHT
         return True
 
-    def wait_for_keypress(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " wait for keypress")
-        register = (opcode & 0x0F00) >> 8
-        key_value = self.keyboard.wait_key_pressed()
-        self.registers.general_purpose[register].set(key_value)
+    # F000 nnnn loads a full 16-bit address from the word that follows it.
+    def load_index_long(self) -> bool:
+        cpu = self.cpu
+        cpu.index = self.memory.get(cpu.program_counter + 2) << 8 | self.memory.get(cpu.program_counter + 3)
+        cpu.program_counter = (cpu.program_counter + 2) & 0xFFFF
         return True
 
-    def move_reg_into_delay_timer(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " move reg into delay timer")
-        register = (opcode & 0x0F00) >> 8
-        delay_timer = self.registers.general_purpose[register].get()
-        self.registers.delay_timer.set(delay_timer)
+    def load_audio_pattern(self) -> bool:
+        self.cpu.pattern = bytes(self.memory.read(self.cpu.index, PATTERN_SIZE))
         return True
 
-    def move_reg_into_sound_timer(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " move reg into sound timer")
-        register = (opcode & 0x0F00) >> 8
-        sound_timer = self.registers.general_purpose[register].get()
-        self.registers.sound_timer.set(sound_timer)
+    def move_reg_into_pitch(self, register: int) -> bool:
+        self.cpu.pitch = self.cpu.v[register]
         return True
 
-    def add_reg_into_index(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " add reg into index")
-        register = (opcode & 0x0F00) >> 8
-        value = self.registers.general_purpose[register].get()
-        self.registers.index.add(value)
+    def select_planes(self, mask: int) -> bool:
+        self.cpu.plane_mask = mask & self.display.all_planes
         return True
 
-    def load_index_with_reg_sprite(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " load index with reg sprite")
-        register = (opcode & 0x0F00) >> 8
-        value = self.registers.general_purpose[register].get()
-        self.registers.index.add(value * 5)
+    def store_bcd_in_memory(self, register: int) -> bool:
+        value = self.cpu.v[register]
+        self.memory.write(self.cpu.index, bytes((value // 100, value // 10 % 10, value % 10)))
         return True
 
-    def store_bcd_in_memory(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " store bcd in memory")
-        register = (opcode & 0x0F00) >> 8
-        index = self.registers.index.get()
-        value = self.registers.general_purpose[register].get()
-        bcd_value = "{:03d}".format(value)
+    def store_regs_in_memory(self, last_register: int) -> bool:
+        self.memory.write(self.cpu.index, self.cpu.v[:last_register + 1])
+        return True
 
-        self.memory.set(index, int(bcd_value[0]))
-        self.memory.set(index + 1, int(bcd_value[1]))
-        self.memory.set(index + 2, int(bcd_value[2]))
+    def store_regs_in_memory_increment(self, last_register: int) -> bool:
+        cpu = self.cpu
+        self.memory.write(cpu.index, cpu.v[:last_register + 1])
+        cpu.index = (cpu.index + last_register + 1) & 0xFFFF
         return True
 
-    def store_regs_in_memory(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " store regs in memory")
-        last_register = (opcode & 0x0F00) >> 8
-        index = self.registers.index.get()
+    def read_regs_from_memory(self, last_register: int) -> bool:
+        self.cpu.v[:last_register + 1] = self.memory.read(self.cpu.index, last_register + 1)
+        return True
 
-        for i in range(last_register + 1):
-            content = self.registers.general_purpose[i].get()
-            self.memory.set(index + i, content)
+    def read_regs_from_memory_increment(self, last_register: int) -> bool:
+        cpu = self.cpu
+        cpu.v[:last_register + 1] = self.memory.read(cpu.index, last_register + 1)
+        cpu.index = (cpu.index + last_register + 1) & 0xFFFF
         return True
 
-    def read_regs_from_memory(self, opcode: int) -> bool:
-        logging.debug(hex(opcode) + " read regs from memory")
-        last_register = (opcode & 0x0F00) >> 8
-        index = self.registers.index.get()
+    def store_regs_in_flags(self, last_register: int) -> bool:
+        cpu = self.cpu
+        cpu.flags[:last_register + 1] = cpu.v[:last_register + 1]
+        return True
 
-        for i in range(last_register + 1):
-            register = self.registers.general_purpose[i]
-            content = self.memory.get(index + i)
-            register.set(content)
+    def read_regs_from_flags(self, last_register: int) -> bool:
+        cpu = self.cpu
+        cpu.v[:last_register + 1] = cpu.flags[:last_register + 1]
         return True
+
+    def unknown_opcode(self, opcode: int) -> bool:
+        raise UnknownOpcodeError(f"unknown opcode {opcode:#06x} at {self.cpu.program_counter:#05x}")
+
+
+LOGICAL_OPERATIONS = {
+    0x0: Chip8.move_reg_into_reg,                # 8xy0
+    0x1: Chip8.logical_or,                       # 8xy1
+    0x2: Chip8.logical_and,                      # 8xy2
+    0x3: Chip8.exclusive_or,                     # 8xy3
+    0x4: Chip8.add_reg_to_reg,                   # 8xy4
+    0x5: Chip8.subtract_reg_from_reg,            # 8xy5
+    0x6: Chip8.right_shift_reg,                  # 8xy6
+    0x7: Chip8.subtract_reg_from_reg1,           # 8xy7
+    0xE: Chip8.left_shift_reg,                   # 8xyE
+}
+
+MISC_OPERATIONS = {
+    0x07: Chip8.move_delay_timer_into_reg,       # Fx07
+    0x0A: Chip8.wait_for_keypress,               # Fx0A
+    0x15: Chip8.move_reg_into_delay_timer,       # Fx15
+    0x18: Chip8.move_reg_into_sound_timer,       # Fx18
+    0x1E: Chip8.add_reg_into_index,              # Fx1E
+    0x29: Chip8.load_index_with_reg_sprite,      # Fx29
+    0x33: Chip8.store_bcd_in_memory,             # Fx33
+    0x55: Chip8.store_regs_in_memory,            # Fx55
+    0x65: Chip8.read_regs_from_memory,           # Fx65
+}
+
+# 00nn operations of extended profiles.
+SCREEN_OPERATIONS = {
+    0xFB: Chip8.scroll_right,                    # 00FB
+    0xFC: Chip8.scroll_left,                     # 00FC
+    0xFD: Chip8.exit_interpreter,                # 00FD
+    0xFE: Chip8.low_resolution,                  # 00FE
+    0xFF: Chip8.high_resolution,                 # 00FF
+}
+
+EXTENDED_MISC_OPERATIONS = {
+    0x30: Chip8.load_index_with_reg_big_sprite,  # Fx30
+    0x75: Chip8.store_regs_in_flags,             # Fx75
+    0x85: Chip8.read_regs_from_flags,            # Fx85
+}
+
+# Replacements for the operations above under the quirks of a profile.
+SHIFT_FROM_VY_OPERATIONS = {
+    0x6: Chip8.right_shift_reg_y,
+    0xE: Chip8.left_shift_reg_y,
+}
+
+RESET_FLAG_OPERATIONS = {
+    0x1: Chip8.logical_or_reset_flag,
+    0x2: Chip8.logical_and_reset_flag,
+    0x3: Chip8.exclusive_or_reset_flag,
+}
+
+INCREMENT_INDEX_OPERATIONS = {
+    0x55: Chip8.store_regs_in_memory_increment,
+    0x65: Chip8.read_regs_from_memory_increment,
+}
+
+
+def decode(opcode: int, profile: QuirkProfile = PROFILES[DEFAULT_PROFILE]) -> Instruction:
+    x = (opcode & 0x0F00) >> 8
+    y = (opcode & 0x00F0) >> 4
+    n = opcode & 0x000F
+    nn = opcode & 0x00FF
+    nnn = opcode & 0x0FFF
+
+    match opcode >> 12:
+        case 0x0:
+            # Only the low byte selects the routine, as it always has.
+            if nn == 0xE0:
+                return Chip8.clear_screen, ()
+            if nn == 0xEE:
+                return Chip8.return_from_subroutine, ()
+            if profile.extended:
+                if y == 0xC:
+                    return Chip8.scroll_down, (n,)
+                if y == 0xD and profile.xo:
+                    return Chip8.scroll_up, (n,)
+                if nn in SCREEN_OPERATIONS:
+                    return SCREEN_OPERATIONS[nn], ()
+            return Chip8.system_call, (nnn,)
+        case 0x1:
+            return Chip8.jump_to_address, (nnn,)
+        case 0x2:
+            return Chip8.call_subroutine, (nnn,)
+        case 0x3:
+            if profile.xo:
+                return Chip8.skip_long_if_reg_equal_val, (x, nn)
+            return Chip8.skip_if_reg_equal_val, (x, nn)
+        case 0x4:
+            if profile.xo:
+                return Chip8.skip_long_if_reg_not_equal_val, (x, nn)
+            return Chip8.skip_if_reg_not_equal_val, (x, nn)
+        case 0x5:
+            if profile.xo and n == 0x2:
+                return Chip8.store_reg_range_in_memory, (x, y)
+            if profile.xo and n == 0x3:
+                return Chip8.read_reg_range_from_memory, (x, y)
+            if profile.xo:
+                return Chip8.skip_long_if_reg_equal_reg, (x, y)
+            return Chip8.skip_if_reg_equal_reg, (x, y)
+        case 0x6:
+            return Chip8.move_value_to_reg, (x, nn)
+        case 0x7:
+            return Chip8.add_value_to_reg, (x, nn)
+        case 0x8:
+            if profile.shift_uses_vy and n in SHIFT_FROM_VY_OPERATIONS:
+                return SHIFT_FROM_VY_OPERATIONS[n], (x, y)
+            if profile.logic_resets_flag and n in RESET_FLAG_OPERATIONS:
+                return RESET_FLAG_OPERATIONS[n], (x, y)
+            if n in LOGICAL_OPERATIONS:
+                return LOGICAL_OPERATIONS[n], (x, y)
+        case 0x9:
+            if profile.xo:
+                return Chip8.skip_long_if_reg_not_equal_reg, (x, y)
+            return Chip8.skip_if_reg_not_equal_reg, (x, y)
+        case 0xA:
+            return Chip8.load_index_reg_with_value, (nnn,)
+        case 0xB:
+            if profile.jump_uses_vx:
+                return Chip8.jump_to_regx_plus_value, (x, nnn)
+            return Chip8.jump_to_reg0_plus_value, (nnn,)
+        case 0xC:
+            return Chip8.generate_random_number, (x, nn)
+        case 0xD:
+            if profile.extended:
+                return Chip8.draw_sprite_extended, (x, y, n)
+            return Chip8.draw_sprite, (x, y, n)
+        case 0xE:
+            if profile.xo and nn == 0x9E:
+                return Chip8.skip_long_if_key_pressed, (x,)
+            if profile.xo and nn == 0xA1:
+                return Chip8.skip_long_if_key_not_pressed, (x,)
+            if nn == 0x9E:
+                return Chip8.skip_if_key_pressed, (x,)
+            if nn == 0xA1:
+                return Chip8.skip_if_key_not_pressed, (x,)
+            return Chip8.no_operation, ()
+        case 0xF:
+            if profile.xo and opcode == 0xF000:
+                return Chip8.load_index_long, ()
+            if profile.xo and nn == 0x01:
+                return Chip8.select_planes, (x,)
+            if profile.xo and opcode == 0xF002:
+                return Chip8.load_audio_pattern, ()
+            if profile.xo and nn == 0x3A:
+                return Chip8.move_reg_into_pitch, (x,)
+            if profile.extended and nn in EXTENDED_MISC_OPERATIONS:
+                return EXTENDED_MISC_OPERATIONS[nn], (x,)
+            if profile.load_store_increments_index and nn in INCREMENT_INDEX_OPERATIONS:
+                return INCREMENT_INDEX_OPERATIONS[nn], (x,)
+            if nn in MISC_OPERATIONS:
+                return MISC_OPERATIONS[nn], (x,)
+    return Chip8.unknown_opcode, (opcode,)
+
+
+# Width, height and number of bitplanes of the display under a profile.
+def display_geometry(profile: QuirkProfile) -> Tuple[int, int, int]:
+    if not profile.extended:
+        return SCREEN_WIDTH, SCREEN_HEIGHT, 1
+    return HIRES_WIDTH, HIRES_HEIGHT, XO_PLANES if profile.xo else 1
+
+
+def create_display(profile: QuirkProfile) -> Display:
+    return Display(*display_geometry(profile))
+
+
+# Decoding every possible opcode once up front leaves a single list lookup
+# per instruction. Equal operand tuples are shared to keep the table small.
+def build_decode_table(profile: QuirkProfile) -> List[Instruction]:
+    operands = {}
+    table = []
+    for opcode in range(0x10000):
+        handler, arguments = decode(opcode, profile)
+        table.append((handler, operands.setdefault(arguments, arguments)))
+    return table
+
+
+# Tables are built the first time a profile is used, then shared by every
+# machine running it.
+DECODE_TABLES: Dict[str, List[Instruction]] = {}
+
+
+def decode_table(profile: QuirkProfile) -> List[Instruction]:
+    table = DECODE_TABLES.get(profile.name)
+    if table is None:
+        table = DECODE_TABLES[profile.name] = build_decode_table(profile)
+    return table
+
+
+DECODE_TABLE = decode_table(PROFILES[DEFAULT_PROFILE])
@@ -0,0 +1,67 @@
+import multiprocessing
+from typing import Optional
+from emulator.AnalysisCache import AnalysisCache
+from emulator.BlockEngine import BlockEngine
+from emulator.Chip8 import Chip8, create_display, display_geometry
+from emulator.KeyBoard import KeyBoard
+from emulator.QuirkProfile import QuirkProfile
+from emulator.Rom import Rom
+from emulator.Scheduler import Scheduler
+from emulator.SharedAudio import SharedAudio
+from emulator.SharedFrame import SharedFrame
+from emulator.SharedInput import SharedInput
+
+# How long a stopped core gets to exit before it is terminated.
+STOP_TIMEOUT = 2.0
+
+
+# Runs a machine in a child process of its own, so it gets a whole CPU core
+# and never waits on the front end. The two only share a SharedFrame: the
+# core publishes a frame whenever its display changed, flags whether its
+# buzzer sounds and reads the keys the front end wrote. The child is forked
+# so it inherits the shared memory mapping instead of attaching to it by
+# name.
+class CoreProcess:
+    def __init__(self, rom: Rom, instructions_per_frame: int, use_blocks: bool = True, turbo: bool = False, profile: Optional[QuirkProfile] = None):
+        self.rom = rom
+        self.profile = profile
+        self.instructions_per_frame = instructions_per_frame
+        self.use_blocks = use_blocks
+        self.turbo = turbo
+        # The display is sized for the profile the machine will run under.
+        self.shared = SharedFrame.create(*display_geometry(profile or QuirkProfile.for_rom(rom)))
+        self.process = multiprocessing.get_context("fork").Process(target=self.run, daemon=True)
+
+    def start(self):
+        self.process.start()
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self):
+        self.shared.request_stop()
+        self.process.join(STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.shared.close()
+
+    # Runs in the child process.
+    def run(self):
+        shared = self.shared
+        display = create_display(self.profile or QuirkProfile.for_rom(self.rom))
+        display.attach(shared)
+        chip8 = Chip8(display, KeyBoard(SharedInput(shared)), profile=self.profile)
+        chip8.load_rom(self.rom)
+
+        engine = chip8
+        if self.use_blocks:
+            engine = BlockEngine(chip8)
+            engine.pretranslate(AnalysisCache().load(self.rom).blocks)
+
+        def poll_input():
+            if shared.stop_requested():
+                scheduler.stop()
+
+        scheduler = Scheduler(chip8, engine, self.instructions_per_frame, self.turbo, poll_input, audio=SharedAudio(shared))
+        scheduler.run()
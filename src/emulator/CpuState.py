@@ -0,0 +1,45 @@
+from typing import Optional
+
+# XO-CHIP audio: a 128 bit pattern, played at 4000 bits a second at pitch 64.
+PATTERN_SIZE = 16
+DEFAULT_PITCH = 64
+
+
+class CallStackError(Exception):
+    pass
+
+
+class CpuState:
+    def __init__(self, num_general_registers: int, pc_start: int, stack_size: int):
+        self.v = bytearray(num_general_registers)
+        self.index = 0
+        self.program_counter = pc_start
+        self.stack_pointer = 0
+        self.stack = [0] * stack_size
+        self.delay_timer = 0
+        self.sound_timer = 0
+        self.waiting_for_key = False
+        # Extended mode state: high resolution, the bitplanes drawing and
+        # clearing affect, and the RPL user flags Fx75 and Fx85 use.
+        self.hires = False
+        self.plane_mask = 1
+        self.flags = bytearray(num_general_registers)
+        # The XO-CHIP sound pattern, the plain buzzer until F002 loads one.
+        self.pattern: Optional[bytes] = None
+        self.pitch = DEFAULT_PITCH
+
+    def __str__(self) -> str:
+        registers = " ".join(f"V{i:X}={value:02x}" for i, value in enumerate(self.v))
+        return f"CpuState({registers} I={self.index:03x} PC={self.program_counter:03x} SP={self.stack_pointer})"
+
+    def push(self, address: int):
+        if self.stack_pointer >= len(self.stack):
+            raise CallStackError(f"call stack overflow at {self.program_counter:#05x}")
+        self.stack[self.stack_pointer] = address
+        self.stack_pointer += 1
+
+    def pop(self) -> int:
+        if self.stack_pointer == 0:
+            raise CallStackError(f"call stack underflow at {self.program_counter:#05x}")
+        self.stack_pointer -= 1
+        return self.stack[self.stack_pointer]
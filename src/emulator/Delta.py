@@ -0,0 +1,37 @@
+import re
+import struct
+
+# Runs of non-zero bytes, absorbing zero gaps too short to be worth a record.
+LITERAL_RUN = re.compile(rb"[^\x00]+(?:\x00{1,7}[^\x00]+)*")
+RUN_HEADER = struct.Struct("<II")
+
+
+def xor_bytes(a: bytes, b: bytes) -> bytes:
+    assert len(a) == len(b), "Delta operands must have the same length"
+    return (int.from_bytes(a, "little") ^ int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+# Encodes data as (zero run length, literal length, literal bytes) records.
+def rle_encode(data: bytes) -> bytes:
+    records = []
+    position = 0
+    for match in LITERAL_RUN.finditer(data):
+        start, end = match.span()
+        records.append(RUN_HEADER.pack(start - position, end - start))
+        records.append(match.group())
+        position = end
+    return b"".join(records)
+
+
+def rle_decode(encoded: bytes, size: int) -> bytes:
+    data = bytearray(size)
+    position = 0
+    offset = 0
+    while offset < len(encoded):
+        zeros, length = RUN_HEADER.unpack_from(encoded, offset)
+        offset += RUN_HEADER.size
+        position += zeros
+        data[position:position + length] = encoded[offset:offset + length]
+        position += length
+        offset += length
+    return bytes(data)
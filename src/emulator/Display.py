@@ -1,19 +1,40 @@
-import pygame
+import hashlib
+from typing import Iterable, List, Set
+from emulator.Renderer import Renderer
 
 
-pygame.init()
+# Expands one framebuffer byte into eight 0/1 pixel bytes.
+PIXEL_BYTES = [bytes((value >> (7 - i)) & 1 for i in range(8)) for value in range(256)]
 
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
 
 class Display:
-    def __init__(self, width: int, height: int, scale: int):
+    def __init__(self, width: int, height: int, num_planes: int = 1):
+        self.renderers: List[Renderer] = []
+        self.dirty_rows: Set[int] = set()
+        self.resize(width, height, num_planes)
+
+    # Clears the display and gives it a new size. Renderers stay attached and
+    # must cope with the new size themselves.
+    def resize(self, width: int, height: int, num_planes: int = 1):
+        assert width % 8 == 0, "Display width must be a multiple of 8"
         self.width = width
         self.height = height
-        self.scale = scale
-        self.screen = pygame.display.set_mode((self.width * self.scale, self.height * self.scale))
-        self.buffer = [[0 for _ in range(self.width)] for _ in range(self.height)]
-        self.changed = False
+        self.num_planes = num_planes
+        self.all_planes = (1 << num_planes) - 1
+        self.row_mask = (1 << width) - 1
+        # Each row of each bitplane is packed into one int, most significant
+        # bit leftmost. Pixels take the color numbered by their plane bits.
+        self.planes = [[0] * height for _ in range(num_planes)]
+        self.rows = self.planes[0]
+        self.dirty_rows.clear()
+        self.mark_all_dirty()
+
+    def attach(self, renderer: Renderer):
+        self.renderers.append(renderer)
+        self.mark_all_dirty()
+
+    def detach(self, renderer: Renderer):
+        self.renderers.remove(renderer)
 
     def get_width(self) -> int:
         return self.width
@@ -22,30 +43,110 @@ class Display:
         return self.height
 
     def set_pixel(self, x: int, y: int, value: int):
-        if self.buffer[y][x] != value:
-            self.changed = True
-        self.buffer[y][x] = value
+        bit = 1 << (self.width - 1 - x)
+        row = self.rows[y] | bit if value else self.rows[y] & ~bit
+        if row != self.rows[y]:
+            self.dirty_rows.add(y)
+        self.rows[y] = row
 
     def get_pixel(self, x: int, y: int) -> int:
-        return self.buffer[y][x]
+        return (self.rows[y] >> (self.width - 1 - x)) & 1
+
+    # Lines are line_width bits wide, sprites wrap around the edges.
+    def draw_sprite(self, x: int, y: int, sprite: Iterable[int], line_width: int = 8, plane: int = 0) -> bool:
+        width = self.width
+        height = self.height
+        row_mask = self.row_mask
+        rows = self.planes[plane]
+        shift = width - line_width
+        right = x % width
+        left = width - right
+        collision = 0
+
+        for j, sprite_line in enumerate(sprite):
+            if not sprite_line:
+                continue
+            line = sprite_line << shift
+            line = ((line >> right) | (line << left)) & row_mask
+            row_y = (y + j) % height
+
+            collision |= rows[row_y] & line
+            rows[row_y] ^= line
+            self.dirty_rows.add(row_y)
+
+        return collision != 0
+
+    # Scrolling moves whole rows, or shifts every row int once, in the planes
+    # selected by mask. Pixels scrolled off the edge are lost.
+    def scroll_down(self, amount: int, mask: int):
+        for plane, rows in enumerate(self.planes):
+            if mask >> plane & 1:
+                rows[:] = ([0] * amount + rows)[:self.height]
+        self.mark_all_dirty()
+
+    def scroll_up(self, amount: int, mask: int):
+        for plane, rows in enumerate(self.planes):
+            if mask >> plane & 1:
+                rows[:] = (rows + [0] * amount)[amount:]
+        self.mark_all_dirty()
+
+    def scroll_right(self, amount: int, mask: int):
+        for plane, rows in enumerate(self.planes):
+            if mask >> plane & 1:
+                rows[:] = [row >> amount for row in rows]
+        self.mark_all_dirty()
+
+    def scroll_left(self, amount: int, mask: int):
+        row_mask = self.row_mask
+        for plane, rows in enumerate(self.planes):
+            if mask >> plane & 1:
+                rows[:] = [(row << amount) & row_mask for row in rows]
+        self.mark_all_dirty()
+
+    # One byte per pixel, the color number of the pixel. Each plane adds its
+    # own bit, so the planes sum without carries.
+    def row_bytes(self, y: int) -> bytes:
+        row_length = self.width // 8
+        packed = self.rows[y].to_bytes(row_length, "big")
+        pixels = b"".join([PIXEL_BYTES[value] for value in packed])
+        if self.num_planes == 1:
+            return pixels
+
+        color = int.from_bytes(pixels, "big")
+        for plane in range(1, self.num_planes):
+            packed = self.planes[plane][y].to_bytes(row_length, "big")
+            color += int.from_bytes(b"".join([PIXEL_BYTES[value] for value in packed]), "big") << plane
+        return color.to_bytes(self.width, "big")
+
+    def mark_all_dirty(self):
+        self.dirty_rows.update(range(self.height))
+
+    # The planes one after the other, each row by row.
+    def to_bytes(self) -> bytes:
+        row_length = self.width // 8
+        return b"".join([row.to_bytes(row_length, "big") for rows in self.planes for row in rows])
+
+    def load_bytes(self, data: bytes):
+        row_length = self.width // 8
+        assert len(data) == row_length * self.height * self.num_planes, "Framebuffer size does not match the display"
+        for plane, rows in enumerate(self.planes):
+            start = plane * self.height
+            rows[:] = [int.from_bytes(data[(start + y) * row_length:(start + y + 1) * row_length], "big") for y in range(self.height)]
+        self.mark_all_dirty()
+
+    def hash(self) -> str:
+        return hashlib.sha1(self.to_bytes()).hexdigest()
 
     def update(self):
-        if not self.changed:
+        if not self.dirty_rows:
             return
 
-        for j in range(self.height):
-            for i in range(self.width):
-                color = WHITE if self.buffer[j][i] else BLACK
-                rect = (i * self.scale, j * self.scale, self.scale, self.scale)
-                pygame.draw.rect(self.screen, color, rect)
-
-        pygame.display.flip()
-        self.changed = False
-
-    def clear(self):
-        self.changed = True
-        
-        for j in range(self.height):
-            for i in range(self.width):
-                self.buffer[j][i] = 0
-        self.update()
\ No newline at end of file
+        for renderer in self.renderers:
+            renderer.render(self)
+        self.dirty_rows.clear()
+
+    def clear(self, mask: int = -1):
+        for plane, rows in enumerate(self.planes):
+            if mask >> plane & 1:
+                rows[:] = [0] * self.height
+        self.mark_all_dirty()
@@ -0,0 +1,189 @@
+import asyncio
+import gc
+import json
+import logging
+import os
+import signal
+import socket
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from emulator.AnalysisCache import AnalysisCache
+from emulator.AsyncRunner import AsyncRunner
+from emulator.BlockEngine import BlockEngine
+from emulator.Chip8 import Chip8, SCREEN_WIDTH, SCREEN_HEIGHT
+from emulator.Display import Display
+from emulator.KeyBoard import KeyBoard
+from emulator.Rom import Rom
+from emulator.Scheduler import Scheduler
+from emulator.StreamServer import StreamServer, UNIX_PREFIX
+
+# Requests and replies are one JSON object on one line.
+MAX_REQUEST_SIZE = 4096
+# A client gets this long to send its request before it is dropped.
+REQUEST_TIMEOUT = 1.0
+DEFAULT_LISTEN = "127.0.0.1:0"
+LISTEN_BACKLOG = 64
+
+
+class SessionRequestError(Exception):
+    pass
+
+
+# A machine with its ROM loaded and its blocks translated, ready to run.
+Session = Tuple[Chip8, BlockEngine]
+
+
+def create_session(rom: Rom) -> Session:
+    chip8 = Chip8(Display(SCREEN_WIDTH, SCREEN_HEIGHT), KeyBoard())
+    chip8.load_rom(rom)
+    engine = BlockEngine(chip8)
+    engine.pretranslate(AnalysisCache().load(rom).blocks)
+    return chip8, engine
+
+
+# Starts streaming sessions by forking a process that already imported the
+# emulator and built its decode table, instead of starting a new interpreter
+# each time. Preloaded ROMs are fully set up machines the child only has to
+# seed and run. Everything built before serving is frozen out of the garbage
+# collector so children share those pages copy-on-write instead of touching
+# them on their first collection.
+#
+# A client connects to the Unix socket and sends a request such as
+# {"rom": "BRIX", "listen": "unix:/tmp/brix.sock", "speed": 10, "frames": 600}.
+# Only "rom" is required. The session replies once it listens, with its pid
+# and the address it streams on, or with {"error": ...}.
+class ForkServer:
+    def __init__(self, roms_directory: Path, instructions_per_frame: int):
+        self.roms_directory = roms_directory
+        self.instructions_per_frame = instructions_per_frame
+        self.sessions: Dict[str, Session] = {}
+        self.listener: Optional[socket.socket] = None
+
+    def preload(self, names: List[str]):
+        for name in names:
+            self.sessions[name] = create_session(Rom(self.roms_directory / name))
+
+    def serve(self, path: Path):
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(str(path))
+        self.listener.listen(LISTEN_BACKLOG)
+        # Sessions are never waited for, the kernel reaps them.
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        gc.freeze()
+        try:
+            while True:
+                connection, _ = self.listener.accept()
+                with connection:
+                    self.handle(connection)
+        finally:
+            self.listener.close()
+            path.unlink()
+
+    def handle(self, connection: socket.socket):
+        connection.settimeout(REQUEST_TIMEOUT)
+        try:
+            request = self.parse_request(connection.makefile("rb").readline(MAX_REQUEST_SIZE))
+        except SessionRequestError as error:
+            reply(connection, {"error": str(error)})
+            return
+        except OSError as error:
+            logging.warning(f"dropping fork server client: {error}")
+            return
+
+        if os.fork() == 0:
+            status = 1
+            try:
+                self.listener.close()
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                status = self.run_session(connection, request)
+            except Exception:
+                logging.exception("session failed")
+            finally:
+                os._exit(status)
+
+    def parse_request(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            raise SessionRequestError(f"invalid request: {error}")
+        if not isinstance(request, dict):
+            raise SessionRequestError("request must be an object")
+
+        name = request.get("rom")
+        if not isinstance(name, str) or Path(name).name != name:
+            raise SessionRequestError("rom must name a file of the roms directory")
+        if name not in self.sessions and not (self.roms_directory / name).is_file():
+            raise SessionRequestError(f"unknown rom {name}")
+        for field in ("speed", "frames", "seed"):
+            if not isinstance(request.get(field, 0), int) or isinstance(request.get(field), bool):
+                raise SessionRequestError(f"{field} must be an integer")
+        if request.get("speed", self.instructions_per_frame) <= 0:
+            raise SessionRequestError("speed must be positive")
+        if not isinstance(request.get("listen", DEFAULT_LISTEN), str):
+            raise SessionRequestError("listen must be an address")
+        if not isinstance(request.get("interpreter", False), bool):
+            raise SessionRequestError("interpreter must be true or false")
+        return request
+
+    # Runs in the child process, returns its exit status.
+    def run_session(self, connection: socket.socket, request: dict) -> int:
+        name = request["rom"]
+        session = self.sessions.get(name)
+        chip8, engine = session if session is not None else create_session(Rom(self.roms_directory / name))
+        # Every child inherits the same generator state.
+        chip8.random.seed(request.get("seed"))
+        if request.get("interpreter", False):
+            engine = chip8
+
+        scheduler = Scheduler(chip8, engine, request.get("speed", self.instructions_per_frame))
+        return asyncio.run(self.stream(connection, request, chip8, scheduler))
+
+    async def stream(self, connection: socket.socket, request: dict, chip8: Chip8, scheduler: Scheduler) -> int:
+        server = StreamServer(chip8.display, chip8.keyboard)
+        try:
+            await server.start(request.get("listen", DEFAULT_LISTEN))
+        except OSError as error:
+            reply(connection, {"error": f"cannot listen: {error}"})
+            return 1
+
+        address = format_address(server.server.sockets[0].getsockname())
+        reply(connection, {"pid": os.getpid(), "address": address})
+        connection.close()
+
+        publisher = asyncio.create_task(server.serve())
+        runner = AsyncRunner()
+        runner.add(scheduler)
+        try:
+            await runner.run(request.get("frames"))
+        finally:
+            publisher.cancel()
+            server.close()
+            if address.startswith(UNIX_PREFIX):
+                os.unlink(address[len(UNIX_PREFIX):])
+        return 0
+
+
+def reply(connection: socket.socket, message: dict):
+    connection.sendall(json.dumps(message).encode() + b"\n")
+
+
+def format_address(address) -> str:
+    if isinstance(address, str):
+        return UNIX_PREFIX + address
+    host, port = address[:2]
+    return f"{host}:{port}"
+
+
+# Asks the fork server listening on path for a session, returns its reply.
+def request_session(path: Path, request: dict) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(str(path))
+        reply(connection, request)
+        line = connection.makefile("rb").readline(MAX_REQUEST_SIZE)
+    if not line:
+        raise SessionRequestError("the session exited before it replied")
+    answer = json.loads(line)
+    if "error" in answer:
+        raise SessionRequestError(answer["error"])
+    return answer
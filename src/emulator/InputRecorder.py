@@ -0,0 +1,20 @@
+from array import array
+from pathlib import Path
+from emulator.InputSource import InputSource
+from emulator.KeyBoard import KeyBoard
+from emulator.MovieInput import write_movie
+
+
+# Records the key state of every frame produced by another source, so the
+# session can be replayed with MovieInput.
+class InputRecorder(InputSource):
+    def __init__(self, source: InputSource):
+        self.source = source
+        self.states = array("H")
+
+    def poll(self, keyboard: KeyBoard):
+        self.source.poll(keyboard)
+        self.states.append(keyboard.get_state())
+
+    def save(self, path: Path):
+        write_movie(path, self.states)
@@ -0,0 +1,4 @@
+class InputSource:
+    # Updates the keyboard once per frame.
+    def poll(self, keyboard):
+        raise NotImplementedError
@@ -1,45 +1,38 @@
-from typing import Dict
-import pygame
-
-
-KEY_MAPPINGS = {
-    pygame.K_x: 0x0,
-    pygame.K_1: 0x1,
-    pygame.K_2: 0x2,
-    pygame.K_3: 0x3,
-    pygame.K_a: 0x4,
-    pygame.K_z: 0x5,
-    pygame.K_e: 0x6,
-    pygame.K_q: 0x7,
-    pygame.K_s: 0x8,
-    pygame.K_d: 0x9,
-    pygame.K_w: 0xA,
-    pygame.K_c: 0xB,
-    pygame.K_4: 0xC,
-    pygame.K_r: 0xD,
-    pygame.K_f: 0xE,
-    pygame.K_v: 0xF,
-}
-
-def get_key_from_value(d: Dict, val: int) -> int:
-    keys = [k for k, v in d.items() if v == val]
-    return keys[0]
+from typing import Optional
+from emulator.InputSource import InputSource
+
+NUM_KEYS = 16
+
 
 class KeyBoard:
-    def __init__(self):
-        pass
-
-    def wait_key_pressed(self) -> int:
-        while True:
-            event = pygame.event.wait()
-            if event.type == pygame.QUIT:
-                exit()
-            elif event.type == pygame.KEYDOWN:
-                key_value = KEY_MAPPINGS.get(event.key)
-                if key_value is not None:
-                    return key_value
+    def __init__(self, source: Optional[InputSource] = None):
+        self.source = source
+        self.keys = bytearray(NUM_KEYS)
+        self.last_pressed: Optional[int] = None
+
+    def poll(self):
+        if self.source is not None:
+            self.source.poll(self)
+
+    def get_state(self) -> int:
+        return sum(1 << key for key in range(NUM_KEYS) if self.keys[key])
+
+    def set_state(self, state: int):
+        for key in range(NUM_KEYS):
+            if state >> key & 1:
+                self.press(key)
+            else:
+                self.release(key)
+
+    def press(self, key: int):
+        if not self.keys[key]:
+            self.last_pressed = key
+        self.keys[key] = 1
+
+    def release(self, key: int):
+        self.keys[key] = 0
 
+    # Only the low nibble names a key, so a stray register value in Ex9E or
+    # ExA1 reads a key instead of crashing the machine.
     def key_pressed(self, key: int) -> bool:
-        keys = pygame.key.get_pressed()
-        mapped_key = get_key_from_value(KEY_MAPPINGS, key)
-        return keys[mapped_key]
\ No newline at end of file
+        return self.keys[key & 0xF] != 0
@@ -0,0 +1,289 @@
+from collections import deque
+from random import Random
+from typing import Deque, Dict, List, Optional, Tuple
+import numpy as np
+from emulator.BatchEngine import BatchEngine, NUM_KEYS
+from emulator.BlockEngine import BlockEngine, MAX_BLOCK_LENGTH
+from emulator.Chip8 import Chip8, PROGRAM_COUNTER_START, SCREEN_WIDTH, SCREEN_HEIGHT
+from emulator.Display import Display
+from emulator.KeyBoard import KeyBoard
+from emulator.QuirkProfile import QuirkProfile
+from emulator.Rom import Rom
+from emulator.RomAnalysis import disassemble
+from emulator.ScriptedInput import ScriptedInput, Press
+
+HISTORY_LENGTH = 24
+MAX_LISTED_DIFFERENCES = 8
+
+# Every field of the machine a program can observe, by name.
+Snapshot = Dict[str, object]
+
+
+class LaneHaltedError(Exception):
+    pass
+
+
+def snapshot(chip8: Chip8) -> Snapshot:
+    cpu = chip8.cpu
+    return {
+        "V": bytes(cpu.v),
+        "I": cpu.index,
+        "PC": cpu.program_counter,
+        "SP": cpu.stack_pointer,
+        "stack": tuple(cpu.stack[:cpu.stack_pointer]),
+        "DT": cpu.delay_timer,
+        "ST": cpu.sound_timer,
+        "waiting_for_key": cpu.waiting_for_key,
+        "hires": cpu.hires,
+        "plane_mask": cpu.plane_mask,
+        "flags": bytes(cpu.flags),
+        "pattern": cpu.pattern,
+        "pitch": cpu.pitch,
+        "memory": bytes(chip8.memory.memory),
+        "framebuffer": chip8.display.to_bytes(),
+    }
+
+
+def first_differences(expected: bytes, actual: bytes) -> List[int]:
+    differences = []
+    for offset, (left, right) in enumerate(zip(expected, actual)):
+        if left != right:
+            differences.append(offset)
+            if len(differences) == MAX_LISTED_DIFFERENCES:
+                break
+    return differences
+
+
+# Lists the fields that differ, one line each. Fields only one side has are
+# not compared. Framebuffer rows of later bitplanes follow those of the first.
+def describe_differences(expected: Snapshot, actual: Snapshot, width: int = SCREEN_WIDTH) -> List[str]:
+    lines = []
+    for field, value in expected.items():
+        other = actual.get(field, value)
+        if other == value:
+            continue
+        if field in ("memory", "framebuffer") and len(value) != len(other):
+            lines.append(f"{field}: {len(value)} bytes reference, {len(other)} candidate")
+        elif field == "V":
+            lines.extend(
+                f"V{register:X}: {value[register]:#04x} reference, {other[register]:#04x} candidate"
+                for register in first_differences(value, other)
+            )
+        elif field == "memory":
+            listed = ", ".join(f"{offset:#05x} ({value[offset]:#04x}/{other[offset]:#04x})" for offset in first_differences(value, other))
+            lines.append(f"memory differs at {listed}")
+        elif field == "framebuffer":
+            row_length = width // 8
+            rows = sorted({offset // row_length for offset in first_differences(value, other)})
+            lines.append(f"framebuffer differs on rows {', '.join(map(str, rows))}")
+        elif isinstance(value, int) and not isinstance(value, bool):
+            lines.append(f"{field}: {value:#x} reference, {other:#x} candidate")
+        else:
+            lines.append(f"{field}: {value} reference, {other} candidate")
+    return lines
+
+
+# A candidate engine runs its own copy of the machine. step() executes one
+# instruction or one block and returns how many instructions it executed.
+class BlockCandidate:
+    def __init__(self, rom: Rom, seed: int, profile: Optional[QuirkProfile]):
+        self.chip8 = Chip8(Display(SCREEN_WIDTH, SCREEN_HEIGHT), KeyBoard(), seed, profile)
+        self.chip8.load_rom(rom)
+        self.engine = BlockEngine(self.chip8)
+
+    def step(self) -> int:
+        return self.engine.step()
+
+    def update_timers(self):
+        self.chip8.update_timers()
+
+    def set_keys(self, state: int):
+        self.chip8.keyboard.set_state(state)
+
+    def snapshot(self) -> Snapshot:
+        return snapshot(self.chip8)
+
+
+# Runs a single lane. Cxnn draws from the same generator as the reference,
+# and a halted lane raises, so it lines up with the error the reference
+# stops on. The lane only knows the default quirk profile, difftest keeps
+# other profiles away from it.
+class BatchCandidate:
+    def __init__(self, rom: Rom, seed: int, profile: Optional[QuirkProfile]):
+        self.batch = BatchEngine(1)
+        self.batch.load_rom(rom)
+        random = Random(seed)
+        self.batch.random_bytes = lambda lanes: np.array([random.randint(0, 255) for _ in lanes], np.uint8)
+
+    def step(self) -> int:
+        self.batch.step()
+        if self.batch.halted[0]:
+            raise LaneHaltedError(f"lane halted at {self.batch.program_counter[0]:#05x}")
+        return 1
+
+    def update_timers(self):
+        self.batch.update_timers()
+
+    def set_keys(self, state: int):
+        self.batch.set_keys([[state >> key & 1 for key in range(NUM_KEYS)]])
+
+    def snapshot(self) -> Snapshot:
+        batch = self.batch
+        stack_pointer = int(batch.stack_pointer[0])
+        return {
+            "V": batch.v[0].tobytes(),
+            "I": int(batch.index[0]),
+            "PC": int(batch.program_counter[0]),
+            "SP": stack_pointer,
+            "stack": tuple(int(address) for address in batch.stack[0, :stack_pointer]),
+            "DT": int(batch.delay_timer[0]),
+            "ST": int(batch.sound_timer[0]),
+            "waiting_for_key": bool(batch.waiting_for_key[0]),
+            "memory": batch.memory[0].tobytes(),
+            "framebuffer": batch.framebuffer_bytes(0),
+        }
+
+
+CANDIDATES = {
+    "blocks": BlockCandidate,
+    "batch": BatchCandidate,
+}
+
+
+# Runs the reference interpreter and a candidate engine side by side on the
+# same ROM, input and random seed, and compares the whole machine after every
+# candidate step. Both sides get timer ticks and key changes at the same
+# instruction counts. run() stops at the first divergence and returns a
+# report of the differing fields and the instructions that led there.
+class Lockstep:
+    def __init__(
+        self, rom: Rom, candidate: str, presses: List[Press], instructions_per_frame: int, seed: int = 0,
+        profile: Optional[QuirkProfile] = None,
+    ):
+        self.reference = Chip8(Display(SCREEN_WIDTH, SCREEN_HEIGHT), KeyBoard(ScriptedInput(presses, loop=True)), seed, profile)
+        self.reference.load_rom(rom)
+        self.candidate = CANDIDATES[candidate](rom, seed, profile)
+        self.instructions_per_frame = instructions_per_frame
+        self.instructions = 0
+        self.frame = 0
+        self.history: Deque[Tuple[int, int]] = deque(maxlen=HISTORY_LENGTH)
+        # Set when both sides stopped on an error, which counts as agreement.
+        self.error: Optional[str] = None
+        self.start_frame()
+
+    def run(self, instructions: int) -> Optional[str]:
+        while self.instructions < instructions:
+            start = self.reference.cpu.program_counter
+            try:
+                executed = self.candidate.step()
+            except Exception as error:
+                return self.stop_on_error(error)
+
+            for _ in range(executed):
+                reference_error = self.step_reference()
+                if reference_error is not None:
+                    return self.report(f"reference raised {reference_error}, the candidate did not")
+
+            expected = snapshot(self.reference)
+            actual = self.candidate.snapshot()
+            if any(actual.get(field, value) != value for field, value in expected.items()):
+                lines = [f"diverged after {self.instructions} instructions, frame {self.frame}, stepping from {start:#05x}"]
+                width = self.reference.display.get_width()
+                lines.extend(f"  {line}" for line in describe_differences(expected, actual, width))
+                return self.report("\n".join(lines))
+
+            while self.instructions >= (self.frame + 1) * self.instructions_per_frame:
+                self.reference.update_timers()
+                self.candidate.update_timers()
+                self.frame += 1
+                self.start_frame()
+        return None
+
+    def start_frame(self):
+        self.reference.keyboard.poll()
+        self.candidate.set_keys(self.reference.keyboard.get_state())
+
+    def step_reference(self) -> Optional[str]:
+        cpu = self.reference.cpu
+        self.history.append((cpu.program_counter, self.reference.fetch_opcode()))
+        try:
+            self.reference.step()
+        except Exception as error:
+            return f"{type(error).__name__}: {error}"
+        self.instructions += 1
+        return None
+
+    # The candidate may raise part way through a block, the reference gets
+    # as many instructions as a block can hold to raise too.
+    def stop_on_error(self, error: Exception) -> Optional[str]:
+        candidate_error = f"{type(error).__name__}: {error}"
+        for _ in range(MAX_BLOCK_LENGTH):
+            reference_error = self.step_reference()
+            if reference_error is not None:
+                if not isinstance(error, LaneHaltedError) and reference_error.split(":")[0] != type(error).__name__:
+                    return self.report(f"reference raised {reference_error}, the candidate raised {candidate_error}")
+                self.error = reference_error
+                return None
+        return self.report(f"candidate raised {candidate_error}, the reference did not")
+
+    def report(self, summary: str) -> str:
+        lines = [summary, "last reference instructions:"]
+        table = self.reference.decode_table
+        lines.extend(f"  {address:#05x}  {opcode:04x}  {disassemble(opcode, table)}" for address, opcode in self.history)
+        return "\n".join(lines)
+
+
+# Opcodes a random program is made of: the low bits of each template are
+# filled with random operands.
+RANDOM_OPCODES = [
+    0x00E0, 0x3000, 0x4000, 0x5000, 0x6000, 0x7000, 0x8000, 0x8001, 0x8002,
+    0x8003, 0x8004, 0x8005, 0x8006, 0x8007, 0x800E, 0x9000, 0xA000, 0xC000, 0xD000,
+    0xE09E, 0xE0A1, 0xF007, 0xF00A, 0xF015, 0xF018, 0xF01E, 0xF029, 0xF033, 0xF055,
+    0xF065,
+]
+RANDOM_OPERANDS = {
+    0x0: 0x0000, 0x3: 0x0FFF, 0x4: 0x0FFF, 0x5: 0x0FF0, 0x6: 0x0FFF, 0x7: 0x0FFF, 0x8: 0x0FF0,
+    0x9: 0x0FF0, 0xA: 0x0FFF, 0xC: 0x0FFF, 0xD: 0x0FFF, 0xE: 0x0F00, 0xF: 0x0F00,
+}
+# Extended profiles add these, with their own operand masks. F000 takes the
+# instruction that follows it as its operand.
+EXTENDED_OPCODES = {
+    0x00C0: 0x000F, 0x00D0: 0x000F, 0x00FB: 0x0000, 0x00FC: 0x0000, 0x00FE: 0x0000, 0x00FF: 0x0000,
+    0x5002: 0x0FF0, 0x5003: 0x0FF0, 0xF000: 0x0000, 0xF001: 0x0300, 0xF002: 0x0000, 0xF030: 0x0F00,
+    0xF03A: 0x0F00, 0xF075: 0x0F00, 0xF085: 0x0F00,
+}
+JUMP_RATE = 0.06
+CALL_RATE = 0.02
+RETURN_RATE = 0.01
+INVALID_RATE = 0.01
+
+
+# A random program of the given number of instructions, mostly valid ones.
+# Jumps and calls land on instructions of the program, which ends with jumps
+# back to its start so skips cannot run off its end. A few opcodes are drawn
+# from the whole opcode space, including encodings the decoder rejects.
+def random_program(random: Random, length: int, extended: bool = False) -> bytes:
+    templates = RANDOM_OPCODES + list(EXTENDED_OPCODES) if extended else RANDOM_OPCODES
+    program = bytearray()
+    for _ in range(length - 2):
+        draw = random.random()
+        target = PROGRAM_COUNTER_START + 2 * random.randrange(length)
+        if draw < JUMP_RATE:
+            opcode = random.choice((0x1000 | target,) * 4 + (0xB000 | target - random.randrange(0x10),))
+        elif draw < JUMP_RATE + CALL_RATE:
+            opcode = 0x2000 | target
+        elif draw < JUMP_RATE + CALL_RATE + RETURN_RATE:
+            opcode = 0x00EE
+        elif draw < JUMP_RATE + CALL_RATE + RETURN_RATE + INVALID_RATE:
+            opcode = random.randrange(0x10000)
+        else:
+            template = random.choice(templates)
+            operands = EXTENDED_OPCODES[template] if template in EXTENDED_OPCODES else RANDOM_OPERANDS[template >> 12]
+            opcode = template | random.randrange(0x10000) & operands
+        program += opcode.to_bytes(2, "big")
+    program += (0x1000 | PROGRAM_COUNTER_START).to_bytes(2, "big") * 2
+    return bytes(program)
+
+
+def random_presses(random: Random, frames: int) -> List[Press]:
+    return [(frame, random.randrange(0x10), random.randrange(1, 10)) for frame in range(0, frames, 7)]
@@ -1,13 +1,44 @@
+from typing import Callable, List
+
+
 class Memory:
     def __init__(self, memory_size: int):
-        self.memory = [0] * memory_size
+        self.write_listeners: List[Callable[[int, int], None]] = []
+        self.resize(memory_size)
+
+    # Replaces the contents with zeroed memory of the given size.
+    def resize(self, memory_size: int):
+        self.memory = bytearray(memory_size)
+        self.view = memoryview(self.memory)
+        self.notify_write(0, memory_size)
     
     def __str__(self) -> str:
-        return f"Memory({self.memory})"
+        return f"Memory({self.memory.hex()})"
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+    def add_write_listener(self, listener: Callable[[int, int], None]):
+        self.write_listeners.append(listener)
+
+    def notify_write(self, position: int, length: int):
+        for listener in self.write_listeners:
+            listener(position, length)
 
     def get(self, position: int) -> int:
         return self.memory[position]
 
     def set(self, position: int, value: int):
-        self.memory[position] = value
-        
\ No newline at end of file
+        self.memory[position] = value & 0xFF
+        self.notify_write(position, 1)
+
+    def read(self, position: int, length: int) -> memoryview:
+        if position + length > len(self.memory):
+            raise IndexError(f"memory read out of range: {position:#x}+{length}")
+        return self.view[position:position + length]
+
+    def write(self, position: int, data: bytes):
+        if position + len(data) > len(self.memory):
+            raise IndexError(f"memory write out of range: {position:#x}+{len(data)}")
+        self.view[position:position + len(data)] = data
+        self.notify_write(position, len(data))
@@ -0,0 +1,39 @@
+import struct
+from array import array
+from pathlib import Path
+from emulator.InputSource import InputSource
+from emulator.KeyBoard import KeyBoard
+
+MOVIE_MAGIC = b"C8MV"
+MOVIE_VERSION = 2
+# magic, version, frame count; followed by one little-endian 16-bit key state per frame
+MOVIE_HEADER = struct.Struct("<4sHI")
+
+
+def read_movie(path: Path) -> array:
+    with path.open("rb") as movie:
+        magic, version, count = MOVIE_HEADER.unpack(movie.read(MOVIE_HEADER.size))
+        assert magic == MOVIE_MAGIC and version == MOVIE_VERSION, "Not a Chip8 movie file"
+        states = array("H")
+        states.frombytes(movie.read(count * states.itemsize))
+    assert len(states) == count, "Movie file is truncated"
+    return states
+
+
+def write_movie(path: Path, states: array):
+    with path.open("wb") as movie:
+        movie.write(MOVIE_HEADER.pack(MOVIE_MAGIC, MOVIE_VERSION, len(states)))
+        movie.write(states.tobytes())
+
+
+class MovieInput(InputSource):
+    def __init__(self, path: Path):
+        self.states = read_movie(path)
+        self.frame = 0
+
+    def finished(self) -> bool:
+        return self.frame >= len(self.states)
+
+    def poll(self, keyboard: KeyBoard):
+        keyboard.set_state(0 if self.finished() else self.states[self.frame])
+        self.frame += 1
@@ -0,0 +1,10 @@
+from emulator.AudioSink import AudioSink
+
+
+# For headless runs.
+class NullAudio(AudioSink):
+    def play(self):
+        pass
+
+    def stop(self):
+        pass
@@ -0,0 +1,68 @@
+import time
+from typing import List, Optional
+from emulator.Display import Display
+from emulator.Renderer import Renderer
+
+FRAME_RATE = 60
+# How many frames the clock may fall behind before it stops trying to catch up.
+MAX_FRAME_LAG = 5
+
+
+# Shows the machine display once per vertical blank. The CPU only marks rows
+# dirty, present() copies the framebuffer to the screen its renderers draw,
+# so a frame costs one render however many sprites were drawn. Blending ORs
+# in the previous frame, which hides the flicker of games that erase and
+# redraw their sprites every frame. When presenting falls more than a frame
+# behind, up to max_frame_skip frames in a row are dropped.
+class Presenter:
+    def __init__(self, display: Display, blend: bool = False, max_frame_skip: int = 0, frame_rate: int = FRAME_RATE):
+        self.display = display
+        self.screen = Display(display.get_width(), display.get_height(), display.num_planes)
+        self.blend = blend
+        self.max_frame_skip = max_frame_skip
+        self.frame_duration = 1 / frame_rate
+        self.previous_planes: List[List[int]] = [list(rows) for rows in display.planes]
+        self.deadline: Optional[float] = None
+        self.presented = 0
+        self.skipped = 0
+        self.skipped_in_a_row = 0
+
+    def attach(self, renderer: Renderer):
+        self.screen.attach(renderer)
+
+    def detach(self, renderer: Renderer):
+        self.screen.detach(renderer)
+
+    def behind(self) -> bool:
+        now = time.perf_counter()
+        if self.deadline is None or now - self.deadline > MAX_FRAME_LAG * self.frame_duration:
+            self.deadline = now
+        late = now - self.deadline > self.frame_duration
+        self.deadline += self.frame_duration
+        return late
+
+    def present(self):
+        planes = self.display.planes
+        if self.max_frame_skip and self.behind() and self.skipped_in_a_row < self.max_frame_skip:
+            self.skipped += 1
+            self.skipped_in_a_row += 1
+            self.previous_planes = [list(rows) for rows in planes]
+            return
+
+        # Renderers attached to the machine display itself, such as a stream,
+        # see every presented frame unblended.
+        self.display.update()
+
+        screen = self.screen
+        for rows, previous_rows, screen_rows in zip(planes, self.previous_planes, screen.planes):
+            for y, row in enumerate(rows):
+                if self.blend:
+                    row |= previous_rows[y]
+                if row != screen_rows[y]:
+                    screen_rows[y] = row
+                    screen.dirty_rows.add(y)
+        screen.update()
+
+        self.previous_planes = [list(rows) for rows in planes]
+        self.presented += 1
+        self.skipped_in_a_row = 0
@@ -0,0 +1,114 @@
+import struct
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from emulator.Chip8 import Chip8
+from emulator.CpuState import CpuState
+
+TRACE_MAGIC = b"C8TR"
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct("<4sHHI")
+# pc, opcode, I, SP, delay timer, sound timer, V0..VF
+TRACE_RECORD = struct.Struct("<HHHBBB16s")
+
+TraceEntry = Tuple[int, int, int, int, int, int, bytes]
+
+
+class TraceBuffer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity * TRACE_RECORD.size)
+        self.position = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def record(self, pc: int, opcode: int, cpu: CpuState):
+        TRACE_RECORD.pack_into(
+            self.buffer, self.position * TRACE_RECORD.size,
+            pc, opcode, cpu.index, cpu.stack_pointer, cpu.delay_timer, cpu.sound_timer, cpu.v,
+        )
+        self.position = (self.position + 1) % self.capacity
+        self.count += 1
+
+    def records(self) -> bytes:
+        split = self.position * TRACE_RECORD.size
+        if self.count < self.capacity:
+            return bytes(self.buffer[:split])
+        return bytes(self.buffer[split:] + self.buffer[:split])
+
+    def entries(self) -> Iterator[TraceEntry]:
+        return TRACE_RECORD.iter_unpack(self.records())
+
+    def dump(self, path: Path):
+        with path.open("wb") as trace:
+            trace.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, TRACE_RECORD.size, len(self)))
+            trace.write(self.records())
+
+    @staticmethod
+    def load(path: Path) -> List[TraceEntry]:
+        with path.open("rb") as trace:
+            magic, version, record_size, count = TRACE_HEADER.unpack(trace.read(TRACE_HEADER.size))
+            assert magic == TRACE_MAGIC and version == TRACE_VERSION, "Not a Chip8 trace file"
+            assert record_size == TRACE_RECORD.size, "Unsupported trace record size"
+            return list(TRACE_RECORD.iter_unpack(trace.read(count * record_size)))
+
+
+# Instruments the reference interpreter. Attaching shadows Chip8.step on the
+# instance, so a Chip8 without a profiler attached runs no profiling code.
+class Profiler:
+    def __init__(self, chip8: Chip8, trace_size: int = 0, crash_dump: Optional[Path] = None):
+        self.chip8 = chip8
+        self.opcode_counts: Counter = Counter()
+        self.handler_times: Dict[str, float] = defaultdict(float)
+        self.pc_counts: Counter = Counter()
+        self.trace = TraceBuffer(trace_size) if trace_size else None
+        self.crash_dump = crash_dump
+
+    def attach(self):
+        self.chip8.step = self.step
+
+    def detach(self):
+        del self.chip8.step
+
+    def step(self):
+        chip8 = self.chip8
+        pc = chip8.cpu.program_counter
+        opcode = chip8.fetch_opcode()
+        if self.trace is not None:
+            self.trace.record(pc, opcode, chip8.cpu)
+
+        start = time.perf_counter()
+        try:
+            name = chip8.decode_table[opcode][0].__name__
+            Chip8.step(chip8)
+        except Exception:
+            if self.trace is not None and self.crash_dump is not None:
+                self.trace.dump(self.crash_dump)
+            raise
+        self.handler_times[name] += time.perf_counter() - start
+        self.opcode_counts[name] += 1
+        self.pc_counts[pc] += 1
+
+    def to_dict(self, top: int = 10) -> dict:
+        return {
+            "handlers": {
+                name: {"count": count, "total_us": self.handler_times[name] * 1e6}
+                for name, count in self.opcode_counts.most_common()
+            },
+            "hot_addresses": {f"{pc:#05x}": count for pc, count in self.pc_counts.most_common(top)},
+        }
+
+    def report(self, top: int = 10) -> str:
+        lines = [f"{'handler':<28} {'count':>10} {'total ms':>10} {'mean ns':>9}"]
+        for name, count in self.opcode_counts.most_common():
+            total = self.handler_times[name]
+            lines.append(f"{name:<28} {count:>10} {total * 1e3:>10.2f} {total / count * 1e9:>9.0f}")
+
+        lines.append("")
+        lines.append(f"{'address':<10} {'count':>10}")
+        for pc, count in self.pc_counts.most_common(top):
+            lines.append(f"{pc:#05x}      {count:>10}")
+        return "\n".join(lines)
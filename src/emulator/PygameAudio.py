@@ -0,0 +1,81 @@
+from array import array
+from typing import Dict, Tuple
+import pygame
+from emulator.AudioSink import AudioSink
+from emulator.CpuState import DEFAULT_PITCH, PATTERN_SIZE
+
+SAMPLE_RATE = 44100
+# 512 samples last under 12 ms, so the buzzer starts and stops within the
+# frame that asked for it.
+BUFFER_SAMPLES = 512
+TONE_FREQUENCY = 440
+AMPLITUDE = 4096
+# Bits a second XO-CHIP plays its pattern at, at the default pitch. Every
+# 48 steps of pitch are an octave.
+PATTERN_RATE = 4000
+PITCH_OCTAVE = 48
+PATTERN_BITS = PATTERN_SIZE * 8
+# The plain tone repeats whole periods over about this long.
+TONE_DURATION = 0.1
+MAX_CACHED_SOUNDS = 16
+
+
+def samples(levels: array, channels: int) -> array:
+    if channels == 1:
+        return levels
+    return array("h", [level for level in levels for _ in range(channels)])
+
+
+def square_wave(sample_rate: int, channels: int) -> array:
+    period = round(sample_rate / TONE_FREQUENCY)
+    high = period // 2
+    periods = max(1, round(sample_rate * TONE_DURATION / period))
+    levels = array("h", ([AMPLITUDE] * high + [-AMPLITUDE] * (period - high)) * periods)
+    return samples(levels, channels)
+
+
+# One turn of the pattern, each bit held for as many samples as its pitch
+# asks for.
+def pattern_wave(pattern: bytes, pitch: int, sample_rate: int, channels: int) -> array:
+    rate = PATTERN_RATE * 2 ** ((pitch - DEFAULT_PITCH) / PITCH_OCTAVE)
+    bits = int.from_bytes(pattern, "big")
+    length = max(1, round(PATTERN_BITS * sample_rate / rate))
+    levels = array("h", [
+        AMPLITUDE if bits >> (PATTERN_BITS - 1 - int(i * rate / sample_rate) % PATTERN_BITS) & 1 else -AMPLITUDE
+        for i in range(length)
+    ])
+    return samples(levels, channels)
+
+
+# Loops a waveform computed ahead of time on a mixer channel of its own, so
+# a frame costs a comparison and starting or stopping the buzzer costs one
+# mixer call. XO-CHIP patterns are computed when a program loads them and
+# kept for when it loads them again.
+class PygameAudio(AudioSink):
+    def __init__(self):
+        super().__init__()
+        # pygame.init() may have opened the mixer with a larger buffer.
+        pygame.mixer.quit()
+        pygame.mixer.init(SAMPLE_RATE, -16, 1, BUFFER_SAMPLES)
+        self.sample_rate, _, self.channels = pygame.mixer.get_init()
+        self.channel = pygame.mixer.Channel(0)
+        self.tone = pygame.mixer.Sound(buffer=square_wave(self.sample_rate, self.channels))
+        self.sounds: Dict[Tuple[bytes, int], pygame.mixer.Sound] = {}
+
+    def play(self):
+        self.channel.play(self.sound(), loops=-1)
+
+    def stop(self):
+        self.channel.stop()
+
+    def sound(self) -> pygame.mixer.Sound:
+        if self.pattern is None:
+            return self.tone
+        key = (self.pattern, self.pitch)
+        sound = self.sounds.get(key)
+        if sound is None:
+            if len(self.sounds) >= MAX_CACHED_SOUNDS:
+                self.sounds.clear()
+            wave = pattern_wave(self.pattern, self.pitch, self.sample_rate, self.channels)
+            sound = self.sounds[key] = pygame.mixer.Sound(buffer=wave)
+        return sound
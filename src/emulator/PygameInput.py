@@ -0,0 +1,44 @@
+from typing import Callable, Optional
+import pygame
+from emulator.InputSource import InputSource
+from emulator.KeyBoard import KeyBoard
+
+
+KEY_MAPPINGS = {
+    pygame.K_x: 0x0,
+    pygame.K_1: 0x1,
+    pygame.K_2: 0x2,
+    pygame.K_3: 0x3,
+    pygame.K_a: 0x4,
+    pygame.K_z: 0x5,
+    pygame.K_e: 0x6,
+    pygame.K_q: 0x7,
+    pygame.K_s: 0x8,
+    pygame.K_d: 0x9,
+    pygame.K_w: 0xA,
+    pygame.K_c: 0xB,
+    pygame.K_4: 0xC,
+    pygame.K_r: 0xD,
+    pygame.K_f: 0xE,
+    pygame.K_v: 0xF,
+}
+
+
+class PygameInput(InputSource):
+    def __init__(self, event_handler: Optional[Callable[[pygame.event.Event], None]] = None):
+        self.event_handler = event_handler
+
+    def poll(self, keyboard: KeyBoard):
+        for event in pygame.event.get():
+            self.handle_event(keyboard, event)
+
+    def handle_event(self, keyboard: KeyBoard, event: pygame.event.Event):
+        key = KEY_MAPPINGS.get(event.key) if event.type in (pygame.KEYDOWN, pygame.KEYUP) else None
+
+        if key is None:
+            if self.event_handler is not None:
+                self.event_handler(event)
+        elif event.type == pygame.KEYDOWN:
+            keyboard.press(key)
+        else:
+            keyboard.release(key)
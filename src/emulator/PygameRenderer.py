@@ -0,0 +1,53 @@
+from typing import Iterable, List, Tuple
+import pygame
+from emulator.Display import Display
+from emulator.Renderer import Renderer
+
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+LIGHT_GRAY = (170, 170, 170)
+DARK_GRAY = (85, 85, 85)
+# Indexed by the plane bits of a pixel, XO-CHIP draws on two planes.
+PALETTE = [BLACK, WHITE, LIGHT_GRAY, DARK_GRAY]
+
+
+def dirty_bands(rows: Iterable[int]) -> List[Tuple[int, int]]:
+    bands = []
+    for y in sorted(rows):
+        if bands and bands[-1][1] == y:
+            bands[-1] = (bands[-1][0], y + 1)
+        else:
+            bands.append((y, y + 1))
+    return bands
+
+
+class PygameRenderer(Renderer):
+    def __init__(self, width: int, height: int, scale: int):
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.screen = pygame.display.set_mode((width * scale, height * scale))
+
+        # The framebuffer is mirrored into an 8-bit palettized surface at
+        # native resolution, so a redraw is one scale and one blit per band.
+        self.pixels = bytearray(width * height)
+        self.native = pygame.image.frombuffer(self.pixels, (width, height), "P")
+        self.native.set_palette(PALETTE)
+        self.scaled = pygame.Surface((width * scale, height * scale), depth=8)
+        self.scaled.set_palette(PALETTE)
+
+    def render(self, display: Display):
+        width = self.width
+        for y in display.dirty_rows:
+            self.pixels[y * width:(y + 1) * width] = display.row_bytes(y)
+
+        rects = []
+        for top, bottom in dirty_bands(display.dirty_rows):
+            source = (0, top, width, bottom - top)
+            target = pygame.Rect(0, top * self.scale, width * self.scale, (bottom - top) * self.scale)
+            pygame.transform.scale(self.native.subsurface(source), target.size, self.scaled.subsurface(target))
+            self.screen.blit(self.scaled, target, target)
+            rects.append(target)
+
+        pygame.display.update(rects)
@@ -0,0 +1,67 @@
+from typing import Dict
+from emulator.Rom import Rom
+
+
+# Where CHIP-8 interpreters disagree, and which extensions they add. Each
+# profile decodes into its own table of handlers, so executing an
+# instruction never checks a quirk.
+class QuirkProfile:
+    def __init__(
+        self,
+        name: str,
+        shift_uses_vy: bool = False,
+        load_store_increments_index: bool = False,
+        logic_resets_flag: bool = False,
+        jump_uses_vx: bool = False,
+        extended: bool = False,
+        xo: bool = False,
+    ):
+        self.name = name
+        # 8xy6 and 8xyE shift Vy into Vx instead of shifting Vx in place.
+        self.shift_uses_vy = shift_uses_vy
+        # Fx55 and Fx65 leave I pointing past the last register.
+        self.load_store_increments_index = load_store_increments_index
+        # 8xy1, 8xy2 and 8xy3 clear VF.
+        self.logic_resets_flag = logic_resets_flag
+        # Bxnn jumps to xnn plus Vx instead of nnn plus V0.
+        self.jump_uses_vx = jump_uses_vx
+        # The SUPER-CHIP instructions and a 128x64 display, on which low
+        # resolution draws every pixel doubled.
+        self.extended = extended
+        # The XO-CHIP instructions, 64 KB of memory and two bitplanes.
+        self.xo = xo
+
+    def __str__(self) -> str:
+        return self.name
+
+    @staticmethod
+    def for_rom(rom: Rom) -> "QuirkProfile":
+        return QuirkProfile.for_sha1(rom.sha1())
+
+    @staticmethod
+    def for_sha1(sha1: str) -> "QuirkProfile":
+        return PROFILES[ROM_PROFILES.get(sha1, DEFAULT_PROFILE)]
+
+
+DEFAULT_PROFILE = "default"
+
+PROFILES: Dict[str, QuirkProfile] = {
+    # What this emulator has always done.
+    "default": QuirkProfile("default"),
+    # The original COSMAC VIP interpreter.
+    "vip": QuirkProfile("vip", shift_uses_vy=True, load_store_increments_index=True, logic_resets_flag=True),
+    # CHIP-48 and SUPER-CHIP quirks without the extensions, for ROMs that
+    # only need the Bxnn jump. They keep the 64x32 display and its speed.
+    "chip48": QuirkProfile("chip48", jump_uses_vx=True),
+    # SUPER-CHIP 1.1 on the HP 48.
+    "schip": QuirkProfile("schip", jump_uses_vx=True, extended=True),
+    # XO-CHIP as Octo runs it.
+    "xochip": QuirkProfile("xochip", shift_uses_vy=True, load_store_increments_index=True, extended=True, xo=True),
+}
+
+# ROMs known to be written for a particular interpreter, by SHA-1. Anything
+# else runs under the default profile.
+ROM_PROFILES: Dict[str, str] = {
+    "d40abc54374e4343639f993e897e00904ddf85d9": "chip48",  # BLINKY
+    "f100197f0f2f05b4f3c8c31ab9c2c3930d3e9571": "chip48",  # INVADERS
+}
@@ -0,0 +1,3 @@
+class Renderer:
+    def render(self, display):
+        raise NotImplementedError
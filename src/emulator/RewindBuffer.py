@@ -0,0 +1,46 @@
+from collections import deque
+from typing import Deque, Optional
+from emulator.Chip8 import Chip8
+from emulator.Delta import rle_decode, rle_encode, xor_bytes
+from emulator.SaveState import SaveState
+
+DEFAULT_REWIND_FRAMES = 600
+
+
+# Keeps the latest state in full and, for every earlier frame, the run-length
+# encoded XOR against the frame after it, so rewinding walks back one delta
+# at a time and the oldest frames simply fall off the end.
+class RewindBuffer:
+    def __init__(self, capacity: int = DEFAULT_REWIND_FRAMES):
+        self.deltas: Deque[bytes] = deque(maxlen=capacity)
+        self.current: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self.deltas)
+
+    def size_bytes(self) -> int:
+        current = len(self.current) if self.current is not None else 0
+        return current + sum(len(delta) for delta in self.deltas)
+
+    def push(self, chip8: Chip8):
+        state = SaveState.capture(chip8).payload
+        if self.current is not None:
+            self.deltas.append(rle_encode(xor_bytes(state, self.current)))
+        self.current = state
+
+    def rewind(self, chip8: Chip8, frames: int = 1) -> int:
+        if self.current is None:
+            return 0
+
+        state = self.current
+        steps = min(frames, len(self.deltas))
+        for _ in range(steps):
+            state = xor_bytes(state, rle_decode(self.deltas.pop(), len(state)))
+
+        self.current = state
+        SaveState(state).restore(chip8)
+        return steps
+
+    def clear(self):
+        self.deltas.clear()
+        self.current = None
@@ -1,5 +1,5 @@
+import hashlib
 from pathlib import Path
-from typing import List
 
 
 class Rom:
@@ -10,9 +10,17 @@ class Rom:
     def __str__(self) -> str:
         return " ".join((hex(value) for value in self.load_data()))
 
-    def load_data(self) -> List[int]:
+    def size(self) -> int:
+        return self.path.stat().st_size
+
+    def sha1(self) -> str:
+        return hashlib.sha1(self.load_data()).hexdigest()
+
+    def load_data(self) -> bytes:
         with self.path.open("rb") as rom:
-            content = rom.read()
-            data = [int(value) for value in content]
+            return rom.read()
 
-        return data
\ No newline at end of file
+    def read_into(self, buffer: memoryview) -> int:
+        assert self.size() <= len(buffer), "Rom does not fit in memory"
+        with self.path.open("rb", buffering=0) as rom:
+            return rom.readinto(buffer)
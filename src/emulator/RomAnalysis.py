@@ -0,0 +1,288 @@
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from emulator.Chip8 import Chip8, DECODE_TABLE, Instruction, PROGRAM_COUNTER_START, decode_table
+from emulator.QuirkProfile import QuirkProfile
+from emulator.Rom import Rom
+
+ANALYSIS_VERSION = 3
+
+MNEMONICS = {
+    Chip8.clear_screen: "CLS",
+    Chip8.return_from_subroutine: "RET",
+    Chip8.scroll_down: "SCD {0}",
+    Chip8.scroll_up: "SCU {0}",
+    Chip8.scroll_right: "SCR",
+    Chip8.scroll_left: "SCL",
+    Chip8.exit_interpreter: "EXIT",
+    Chip8.low_resolution: "LOW",
+    Chip8.high_resolution: "HIGH",
+    Chip8.system_call: "SYS {0:#05x}",
+    Chip8.jump_to_address: "JP {0:#05x}",
+    Chip8.call_subroutine: "CALL {0:#05x}",
+    Chip8.skip_if_reg_equal_val: "SE V{0:X}, {1:#04x}",
+    Chip8.skip_long_if_reg_equal_val: "SE V{0:X}, {1:#04x}",
+    Chip8.skip_if_reg_not_equal_val: "SNE V{0:X}, {1:#04x}",
+    Chip8.skip_long_if_reg_not_equal_val: "SNE V{0:X}, {1:#04x}",
+    Chip8.skip_if_reg_equal_reg: "SE V{0:X}, V{1:X}",
+    Chip8.skip_long_if_reg_equal_reg: "SE V{0:X}, V{1:X}",
+    Chip8.store_reg_range_in_memory: "LD [I], V{0:X}-V{1:X}",
+    Chip8.read_reg_range_from_memory: "LD V{0:X}-V{1:X}, [I]",
+    Chip8.move_value_to_reg: "LD V{0:X}, {1:#04x}",
+    Chip8.add_value_to_reg: "ADD V{0:X}, {1:#04x}",
+    Chip8.move_reg_into_reg: "LD V{0:X}, V{1:X}",
+    Chip8.logical_or: "OR V{0:X}, V{1:X}",
+    Chip8.logical_or_reset_flag: "OR V{0:X}, V{1:X}",
+    Chip8.logical_and: "AND V{0:X}, V{1:X}",
+    Chip8.logical_and_reset_flag: "AND V{0:X}, V{1:X}",
+    Chip8.exclusive_or: "XOR V{0:X}, V{1:X}",
+    Chip8.exclusive_or_reset_flag: "XOR V{0:X}, V{1:X}",
+    Chip8.add_reg_to_reg: "ADD V{0:X}, V{1:X}",
+    Chip8.subtract_reg_from_reg: "SUB V{0:X}, V{1:X}",
+    Chip8.right_shift_reg: "SHR V{0:X}, V{1:X}",
+    Chip8.right_shift_reg_y: "SHR V{0:X}, V{1:X}",
+    Chip8.subtract_reg_from_reg1: "SUBN V{0:X}, V{1:X}",
+    Chip8.left_shift_reg: "SHL V{0:X}, V{1:X}",
+    Chip8.left_shift_reg_y: "SHL V{0:X}, V{1:X}",
+    Chip8.skip_if_reg_not_equal_reg: "SNE V{0:X}, V{1:X}",
+    Chip8.skip_long_if_reg_not_equal_reg: "SNE V{0:X}, V{1:X}",
+    Chip8.load_index_reg_with_value: "LD I, {0:#05x}",
+    Chip8.jump_to_reg0_plus_value: "JP V0, {0:#05x}",
+    Chip8.jump_to_regx_plus_value: "JP V{0:X}, {1:#05x}",
+    Chip8.generate_random_number: "RND V{0:X}, {1:#04x}",
+    Chip8.draw_sprite: "DRW V{0:X}, V{1:X}, {2}",
+    Chip8.draw_sprite_extended: "DRW V{0:X}, V{1:X}, {2}",
+    Chip8.skip_if_key_pressed: "SKP V{0:X}",
+    Chip8.skip_long_if_key_pressed: "SKP V{0:X}",
+    Chip8.skip_if_key_not_pressed: "SKNP V{0:X}",
+    Chip8.skip_long_if_key_not_pressed: "SKNP V{0:X}",
+    Chip8.no_operation: "NOP",
+    Chip8.move_delay_timer_into_reg: "LD V{0:X}, DT",
+    Chip8.wait_for_keypress: "LD V{0:X}, K",
+    Chip8.move_reg_into_delay_timer: "LD DT, V{0:X}",
+    Chip8.move_reg_into_sound_timer: "LD ST, V{0:X}",
+    Chip8.add_reg_into_index: "ADD I, V{0:X}",
+    Chip8.load_index_with_reg_sprite: "LD F, V{0:X}",
+    Chip8.load_index_with_reg_big_sprite: "LD HF, V{0:X}",
+    Chip8.load_index_long: "LD I, LONG",
+    Chip8.select_planes: "PLANE {0}",
+    Chip8.load_audio_pattern: "AUDIO",
+    Chip8.move_reg_into_pitch: "PITCH V{0:X}",
+    Chip8.store_bcd_in_memory: "LD B, V{0:X}",
+    Chip8.store_regs_in_memory: "LD [I], V{0:X}",
+    Chip8.store_regs_in_memory_increment: "LD [I], V{0:X}",
+    Chip8.read_regs_from_memory: "LD V{0:X}, [I]",
+    Chip8.read_regs_from_memory_increment: "LD V{0:X}, [I]",
+    Chip8.store_regs_in_flags: "LD R, V{0:X}",
+    Chip8.read_regs_from_flags: "LD V{0:X}, R",
+    Chip8.unknown_opcode: "??? {0:#06x}",
+}
+
+# Skips of the XO-CHIP profile, which step over both words of F000 nnnn.
+LONG_SKIPS = {
+    Chip8.skip_long_if_reg_equal_val, Chip8.skip_long_if_reg_not_equal_val, Chip8.skip_long_if_reg_equal_reg,
+    Chip8.skip_long_if_reg_not_equal_reg, Chip8.skip_long_if_key_pressed, Chip8.skip_long_if_key_not_pressed,
+}
+
+SKIPS = {
+    Chip8.skip_if_reg_equal_val, Chip8.skip_if_reg_not_equal_val, Chip8.skip_if_reg_equal_reg,
+    Chip8.skip_if_reg_not_equal_reg, Chip8.skip_if_key_pressed, Chip8.skip_if_key_not_pressed,
+} | LONG_SKIPS
+
+
+# The functions below decode with the default profile unless given the
+# decode table of another.
+def disassemble(opcode: int, table: List[Instruction] = DECODE_TABLE) -> str:
+    handler, operands = table[opcode]
+    return MNEMONICS[handler].format(*operands)
+
+
+def successors(address: int, opcode: int, table: List[Instruction] = DECODE_TABLE) -> List[int]:
+    handler, operands = table[opcode]
+    if handler is Chip8.jump_to_address:
+        return [operands[0]]
+    if handler is Chip8.call_subroutine:
+        return [operands[0], address + 2]
+    if handler in SKIPS:
+        return [address + 2, address + 4]
+    if handler is Chip8.load_index_long:
+        return [address + 4]
+    # Bnnn targets depend on a register, returns on the call stack, and
+    # unknown opcodes and 00FD stop the machine: none of them has a static
+    # successor.
+    if handler in (
+        Chip8.jump_to_reg0_plus_value, Chip8.jump_to_regx_plus_value, Chip8.return_from_subroutine,
+        Chip8.unknown_opcode, Chip8.exit_interpreter,
+    ):
+        return []
+    return [address + 2]
+
+
+# Bytes written to memory by Fx33, Fx55 and 5xy2.
+def store_length(opcode: int, table: List[Instruction] = DECODE_TABLE) -> int:
+    handler, operands = table[opcode]
+    if handler is Chip8.store_bcd_in_memory:
+        return 3
+    if handler in (Chip8.store_regs_in_memory, Chip8.store_regs_in_memory_increment):
+        return operands[0] + 1
+    if handler is Chip8.store_reg_range_in_memory:
+        return abs(operands[1] - operands[0]) + 1
+    return 0
+
+
+# Static facts about a ROM: the code reachable from the entry point split
+# into basic blocks, the data around it and the stores that may rewrite it.
+class RomAnalysis:
+    def __init__(
+        self,
+        sha1: str,
+        data: bytes,
+        code: List[int],
+        blocks: Dict[int, List[int]],
+        indirect_jumps: List[int],
+        self_modifying_stores: List[int],
+        unresolved_stores: List[int],
+    ):
+        self.sha1 = sha1
+        self.data = data
+        self.code = code
+        self.blocks = blocks
+        self.indirect_jumps = indirect_jumps
+        self.self_modifying_stores = self_modifying_stores
+        self.unresolved_stores = unresolved_stores
+        self.profile = QuirkProfile.for_sha1(sha1)
+        self.table = decode_table(self.profile)
+
+    def opcode(self, address: int) -> int:
+        offset = address - PROGRAM_COUNTER_START
+        return self.data[offset] << 8 | self.data[offset + 1]
+
+    def handler_counts(self) -> Counter:
+        return Counter(self.table[self.opcode(address)][0].__name__ for address in self.code)
+
+    def covered_addresses(self) -> Set[int]:
+        covered = set()
+        for address in self.code:
+            covered.update((address, address + 1))
+        return covered
+
+    def data_regions(self) -> List[Tuple[int, int]]:
+        covered = self.covered_addresses()
+
+        regions = []
+        start: Optional[int] = None
+        end = PROGRAM_COUNTER_START + len(self.data)
+        for address in range(PROGRAM_COUNTER_START, end + 1):
+            if address < end and address not in covered:
+                if start is None:
+                    start = address
+            elif start is not None:
+                regions.append((start, address))
+                start = None
+        return regions
+
+    def disassembly(self) -> Iterator[str]:
+        lines = {address: disassemble(self.opcode(address), self.table) for address in self.code}
+        for start, end in self.data_regions():
+            for address in range(start, end):
+                lines[address] = f"DB {self.data[address - PROGRAM_COUNTER_START]:#04x}"
+
+        for address in sorted(lines):
+            label = ">" if address in self.blocks else " "
+            yield f"{address:#05x} {label} {lines[address]}"
+
+    @staticmethod
+    def analyze(rom: Rom) -> "RomAnalysis":
+        data = rom.load_data()
+        end = PROGRAM_COUNTER_START + len(data)
+        table = decode_table(QuirkProfile.for_rom(rom))
+        # Not even the first instruction is complete.
+        if len(data) < 2:
+            return RomAnalysis(rom.sha1(), data, [], {}, [], [], [])
+
+        # Everything reachable from the entry point, following both ways
+        # of every branch.
+        opcodes: Dict[int, int] = {}
+        edges: Dict[int, List[int]] = {}
+        pending = [PROGRAM_COUNTER_START]
+        while pending:
+            address = pending.pop()
+            if address in opcodes or not PROGRAM_COUNTER_START <= address < end - 1:
+                continue
+            offset = address - PROGRAM_COUNTER_START
+            opcodes[address] = data[offset] << 8 | data[offset + 1]
+            edges[address] = successors(address, opcodes[address], table)
+            if table[opcodes[address]][0] in LONG_SKIPS and data[offset + 2:offset + 4] == b"\xf0\x00":
+                edges[address] = [address + 2, address + 6]
+            pending.extend(edges[address])
+
+        # A block starts at the entry point, at every branch target and after
+        # every instruction that does not simply fall through.
+        leaders = {PROGRAM_COUNTER_START}
+        for address, targets in edges.items():
+            if targets != [address + 2]:
+                leaders.update(target for target in targets if target in opcodes)
+
+        blocks: Dict[int, List[int]] = {}
+        self_modifying_stores = []
+        unresolved_stores = []
+        for leader in sorted(leaders):
+            address = leader
+            # I is only tracked inside the block, through Annn.
+            index: Optional[int] = None
+            while True:
+                handler, operands = table[opcodes[address]]
+                if handler is Chip8.load_index_reg_with_value:
+                    index = operands[0]
+                elif handler in (
+                    Chip8.add_reg_into_index, Chip8.load_index_with_reg_sprite, Chip8.load_index_with_reg_big_sprite,
+                    Chip8.load_index_long, Chip8.store_regs_in_memory_increment, Chip8.read_regs_from_memory_increment,
+                ):
+                    index = None
+
+                length = store_length(opcodes[address], table)
+                if length and index is None:
+                    unresolved_stores.append(address)
+                elif length and any(
+                    written in opcodes or written - 1 in opcodes for written in range(index, index + length)
+                ):
+                    self_modifying_stores.append(address)
+
+                following = address + 2
+                if edges[address] != [following] or following in leaders or following not in opcodes:
+                    blocks[leader] = [target for target in edges[address] if target in opcodes]
+                    break
+                address = following
+
+        indirect_jumps = [
+            address for address, opcode in opcodes.items()
+            if table[opcode][0] in (Chip8.jump_to_reg0_plus_value, Chip8.jump_to_regx_plus_value)
+        ]
+        return RomAnalysis(
+            rom.sha1(), data, sorted(opcodes), blocks, sorted(indirect_jumps),
+            self_modifying_stores, unresolved_stores,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "version": ANALYSIS_VERSION,
+            "sha1": self.sha1,
+            "profile": self.profile.name,
+            "data": self.data.hex(),
+            "code": self.code,
+            "blocks": [[start, targets] for start, targets in self.blocks.items()],
+            "indirect_jumps": self.indirect_jumps,
+            "self_modifying_stores": self.self_modifying_stores,
+            "unresolved_stores": self.unresolved_stores,
+        }
+
+    @staticmethod
+    def from_dict(values: dict) -> "RomAnalysis":
+        return RomAnalysis(
+            values["sha1"],
+            bytes.fromhex(values["data"]),
+            values["code"],
+            {start: targets for start, targets in values["blocks"]},
+            values["indirect_jumps"],
+            values["self_modifying_stores"],
+            values["unresolved_stores"],
+        )
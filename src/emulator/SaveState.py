@@ -0,0 +1,97 @@
+import struct
+import zlib
+from pathlib import Path
+from emulator.Chip8 import Chip8, NUM_REGISTERS, STACK_SIZE
+from emulator.CpuState import PATTERN_SIZE
+
+SAVE_STATE_MAGIC = b"C8SS"
+SAVE_STATE_VERSION = 4
+HEADER = struct.Struct("<4sHI")
+# V0..VF, I, PC, SP, call stack, delay timer, sound timer, waiting for key,
+# high resolution, plane mask, RPL flags, has a sound pattern, sound pattern,
+# pitch, rom length, memory size, display width, display height, display
+# planes
+MACHINE = struct.Struct(f"<{NUM_REGISTERS}sHHB{STACK_SIZE}HBB??B{NUM_REGISTERS}s?{PATTERN_SIZE}sBHIHHB")
+
+
+class InvalidSaveStateError(Exception):
+    pass
+
+
+class SaveState:
+    def __init__(self, payload: bytes):
+        self.payload = payload
+
+    def __len__(self) -> int:
+        return len(self.payload)
+
+    @staticmethod
+    def capture(chip8: Chip8) -> "SaveState":
+        cpu = chip8.cpu
+        display = chip8.display
+        machine = MACHINE.pack(
+            cpu.v, cpu.index, cpu.program_counter, cpu.stack_pointer, *cpu.stack,
+            cpu.delay_timer, cpu.sound_timer, cpu.waiting_for_key, cpu.hires, cpu.plane_mask, bytes(cpu.flags),
+            cpu.pattern is not None, cpu.pattern or bytes(PATTERN_SIZE), cpu.pitch,
+            chip8.rom_length, len(chip8.memory), display.get_width(), display.get_height(), display.num_planes,
+        )
+        return SaveState(machine + chip8.memory.memory + display.to_bytes())
+
+    def restore(self, chip8: Chip8):
+        cpu = chip8.cpu
+        display = chip8.display
+        fields = MACHINE.unpack_from(self.payload)
+        v, index, program_counter, stack_pointer = fields[:4]
+        stack = fields[4:4 + STACK_SIZE]
+        (
+            delay_timer, sound_timer, waiting_for_key, hires, plane_mask, flags, has_pattern, pattern, pitch,
+            rom_length, memory_size, width, height, planes,
+        ) = fields[4 + STACK_SIZE:]
+
+        if memory_size != len(chip8.memory) or (width, height, planes) != (display.get_width(), display.get_height(), display.num_planes):
+            raise InvalidSaveStateError("save state was taken on a differently sized machine")
+
+        cpu.v[:] = v
+        cpu.index = index
+        cpu.program_counter = program_counter
+        cpu.stack_pointer = stack_pointer
+        cpu.stack[:] = stack
+        cpu.delay_timer = delay_timer
+        cpu.sound_timer = sound_timer
+        cpu.waiting_for_key = waiting_for_key
+        cpu.hires = hires
+        cpu.plane_mask = plane_mask
+        cpu.flags[:] = flags
+        cpu.pattern = pattern if has_pattern else None
+        cpu.pitch = pitch
+        chip8.rom_length = rom_length
+        memory_start = MACHINE.size
+        display_start = memory_start + memory_size
+        chip8.memory.write(0, self.payload[memory_start:display_start])
+        display.load_bytes(self.payload[display_start:])
+
+    def to_bytes(self) -> bytes:
+        header = HEADER.pack(SAVE_STATE_MAGIC, SAVE_STATE_VERSION, zlib.crc32(self.payload))
+        return header + self.payload
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "SaveState":
+        if len(data) < HEADER.size:
+            raise InvalidSaveStateError("save state is truncated")
+        magic, version, checksum = HEADER.unpack_from(data)
+        if magic != SAVE_STATE_MAGIC:
+            raise InvalidSaveStateError("not a Chip8 save state")
+        if version != SAVE_STATE_VERSION:
+            raise InvalidSaveStateError(f"unsupported save state version {version}")
+
+        payload = data[HEADER.size:]
+        if zlib.crc32(payload) != checksum:
+            raise InvalidSaveStateError("save state checksum mismatch")
+        return SaveState(payload)
+
+    def write(self, path: Path):
+        path.write_bytes(self.to_bytes())
+
+    @staticmethod
+    def read(path: Path) -> "SaveState":
+        return SaveState.from_bytes(path.read_bytes())
@@ -0,0 +1,88 @@
+import time
+from typing import Callable, Optional, Protocol
+from emulator.AudioSink import AudioSink
+from emulator.Chip8 import Chip8
+from emulator.NullAudio import NullAudio
+from emulator.Presenter import Presenter, FRAME_RATE, MAX_FRAME_LAG
+
+DEFAULT_INSTRUCTIONS_PER_FRAME = 10
+
+
+class Engine(Protocol):
+    def run(self, count: int) -> int:
+        ...
+
+
+class Scheduler:
+    def __init__(
+        self,
+        chip8: Chip8,
+        engine: Optional[Engine] = None,
+        instructions_per_frame: int = DEFAULT_INSTRUCTIONS_PER_FRAME,
+        turbo: bool = False,
+        poll_input: Optional[Callable[[], None]] = None,
+        presenter: Optional[Presenter] = None,
+        audio: Optional[AudioSink] = None,
+    ):
+        self.chip8 = chip8
+        self.engine = engine or chip8
+        self.instructions_per_frame = instructions_per_frame
+        self.turbo = turbo
+        self.poll_input = poll_input
+        self.presenter = presenter or Presenter(chip8.display)
+        self.audio = audio or NullAudio()
+        self.frame_duration = 1 / FRAME_RATE
+        self.frame = 0
+        self.instructions = 0
+        self.budget = 0
+        self.running = False
+
+    def stop(self):
+        self.running = False
+
+    def run_frame(self):
+        self.poll()
+        self.tick()
+        self.present()
+
+    def poll(self):
+        self.chip8.keyboard.poll()
+        if self.poll_input is not None:
+            self.poll_input()
+
+    def tick(self):
+        # Engines may run past the budget to finish a block, the overshoot
+        # is paid back on the next frame so the average rate stays exact.
+        self.budget += self.instructions_per_frame
+        if self.budget > 0:
+            executed = self.engine.run(self.budget)
+            self.budget -= executed
+            self.instructions += executed
+
+        # The buzzer sounds for as many frames as the sound timer was set to.
+        cpu = self.chip8.cpu
+        self.audio.update(cpu.sound_timer, cpu.pattern, cpu.pitch)
+        self.chip8.update_timers()
+        self.frame += 1
+
+    def present(self):
+        self.presenter.present()
+
+    def run(self, frames: Optional[int] = None):
+        self.running = True
+        last_frame = self.frame if frames is None else self.frame + frames
+        deadline = time.perf_counter()
+
+        while self.running and (frames is None or self.frame < last_frame):
+            self.run_frame()
+            if self.turbo:
+                continue
+
+            deadline += self.frame_duration
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif -delay > MAX_FRAME_LAG * self.frame_duration:
+                deadline = time.perf_counter()
+
+        self.running = False
@@ -0,0 +1,24 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from emulator.InputSource import InputSource
+from emulator.KeyBoard import KeyBoard
+
+# (first frame, key, frames held)
+Press = Tuple[int, int, int]
+
+
+class ScriptedInput(InputSource):
+    def __init__(self, presses: List[Press], loop: bool = False):
+        states: Dict[int, int] = defaultdict(int)
+        for start, key, duration in presses:
+            for frame in range(start, start + duration):
+                states[frame] |= 1 << key
+        self.states = dict(states)
+        self.length = max(self.states, default=-1) + 1
+        self.loop = loop
+        self.frame = 0
+
+    def poll(self, keyboard: KeyBoard):
+        frame = self.frame % self.length if self.loop and self.length else self.frame
+        keyboard.set_state(self.states.get(frame, 0))
+        self.frame += 1
@@ -0,0 +1,17 @@
+from emulator.AudioSink import AudioSink
+from emulator.SharedFrame import SharedFrame
+
+
+# Tells the front end process through a SharedFrame whether the buzzer of
+# the core sounds. Sound patterns stay in the core, the front end plays
+# the plain tone.
+class SharedAudio(AudioSink):
+    def __init__(self, shared: SharedFrame):
+        super().__init__()
+        self.shared = shared
+
+    def play(self):
+        self.shared.set_sound(True)
+
+    def stop(self):
+        self.shared.set_sound(False)
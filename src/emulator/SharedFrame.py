@@ -0,0 +1,84 @@
+import struct
+from multiprocessing import shared_memory
+from typing import Tuple
+from emulator.Display import Display
+from emulator.Renderer import Renderer
+
+# Layout: 32-bit sequence counter, 16-bit key state, stop flag, sound flag,
+# framebuffer.
+SEQUENCE = struct.Struct("<I")
+KEYS = struct.Struct("<H")
+KEYS_OFFSET = 4
+STOP_OFFSET = 6
+SOUND_OFFSET = 7
+FRAMEBUFFER_OFFSET = 8
+
+
+# A framebuffer and key state shared between an emulator core process and a
+# front end process. The core is the only writer of the framebuffer and the
+# front end the only writer of the keys. Frames are guarded by a sequence
+# lock: the counter is odd while a frame is being written, readers copy the
+# frame and retry until they saw the same even counter before and after.
+class SharedFrame(Renderer):
+    def __init__(self, memory: shared_memory.SharedMemory, width: int, height: int, planes: int, owner: bool):
+        self.memory = memory
+        self.buffer = memory.buf
+        self.width = width
+        self.height = height
+        self.planes = planes
+        self.framebuffer_size = width * height // 8 * planes
+        self.owner = owner
+        self.sequence = 0
+
+    @staticmethod
+    def create(width: int, height: int, planes: int = 1) -> "SharedFrame":
+        size = FRAMEBUFFER_OFFSET + width * height // 8 * planes
+        memory = shared_memory.SharedMemory(create=True, size=size)
+        memory.buf[:size] = bytes(size)
+        return SharedFrame(memory, width, height, planes, True)
+
+    def render(self, display: Display):
+        self.publish(display.to_bytes())
+
+    def publish(self, framebuffer: bytes):
+        assert len(framebuffer) == self.framebuffer_size, "Framebuffer size does not match the shared frame"
+        SEQUENCE.pack_into(self.buffer, 0, self.sequence + 1)
+        self.buffer[FRAMEBUFFER_OFFSET:FRAMEBUFFER_OFFSET + self.framebuffer_size] = framebuffer
+        self.sequence += 2
+        SEQUENCE.pack_into(self.buffer, 0, self.sequence)
+
+    # Returns the sequence number of the latest complete frame and the frame.
+    def read(self) -> Tuple[int, bytes]:
+        end = FRAMEBUFFER_OFFSET + self.framebuffer_size
+        while True:
+            before, = SEQUENCE.unpack_from(self.buffer, 0)
+            if before & 1:
+                continue
+            framebuffer = bytes(self.buffer[FRAMEBUFFER_OFFSET:end])
+            after, = SEQUENCE.unpack_from(self.buffer, 0)
+            if before == after:
+                return before, framebuffer
+
+    def get_keys(self) -> int:
+        return KEYS.unpack_from(self.buffer, KEYS_OFFSET)[0]
+
+    def set_keys(self, state: int):
+        KEYS.pack_into(self.buffer, KEYS_OFFSET, state)
+
+    def set_sound(self, playing: bool):
+        self.buffer[SOUND_OFFSET] = playing
+
+    def sound_playing(self) -> bool:
+        return self.buffer[SOUND_OFFSET] != 0
+
+    def request_stop(self):
+        self.buffer[STOP_OFFSET] = 1
+
+    def stop_requested(self) -> bool:
+        return self.buffer[STOP_OFFSET] != 0
+
+    def close(self):
+        self.buffer = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
@@ -0,0 +1,12 @@
+from emulator.InputSource import InputSource
+from emulator.KeyBoard import KeyBoard
+from emulator.SharedFrame import SharedFrame
+
+
+# Reads the keypad written by the front end process into a SharedFrame.
+class SharedInput(InputSource):
+    def __init__(self, shared: SharedFrame):
+        self.shared = shared
+
+    def poll(self, keyboard: KeyBoard):
+        keyboard.set_state(self.shared.get_keys())
@@ -0,0 +1,85 @@
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional, Tuple
+from emulator.Delta import rle_decode, xor_bytes
+from emulator.StreamServer import (
+    DELTA, FRAME_HEADER, KEY_EVENT, KEYFRAME, STREAM_HELLO, STREAM_MAGIC, STREAM_VERSION, parse_address,
+)
+
+# sequence number, milliseconds since the stream started, framebuffer
+Frame = Tuple[int, int, bytes]
+
+
+class InvalidStreamError(Exception):
+    pass
+
+
+# Reads a frame stream from a StreamServer, or from a file it was saved to,
+# and rebuilds the framebuffer of every frame.
+class StreamClient:
+    def __init__(self, reader: asyncio.StreamReader, writer: Optional[asyncio.StreamWriter] = None):
+        self.reader = reader
+        self.writer = writer
+        self.recording: Optional[BinaryIO] = None
+        self.width = 0
+        self.height = 0
+        self.planes = 1
+
+    @staticmethod
+    async def connect(address: str) -> "StreamClient":
+        host, port = parse_address(address)
+        if port is None:
+            reader, writer = await asyncio.open_unix_connection(host)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return StreamClient(reader, writer)
+
+    @staticmethod
+    def open_file(path: Path) -> "StreamClient":
+        reader = asyncio.StreamReader()
+        reader.feed_data(path.read_bytes())
+        reader.feed_eof()
+        return StreamClient(reader)
+
+    # Saves everything received from now on, the stream hello included.
+    def record(self, recording: BinaryIO):
+        self.recording = recording
+
+    async def read(self, size: int) -> bytes:
+        data = await self.reader.readexactly(size)
+        if self.recording is not None:
+            self.recording.write(data)
+        return data
+
+    # Returns the width, height and number of planes of the display.
+    async def start(self) -> Tuple[int, int, int]:
+        magic, version, self.width, self.height, self.planes = STREAM_HELLO.unpack(await self.read(STREAM_HELLO.size))
+        if magic != STREAM_MAGIC or version != STREAM_VERSION:
+            raise InvalidStreamError("not a Chip8 frame stream")
+        return self.width, self.height, self.planes
+
+    async def frames(self) -> AsyncIterator[Frame]:
+        size = self.width * self.height // 8 * self.planes
+        framebuffer = bytes(size)
+        while True:
+            try:
+                kind, sequence, milliseconds, length = FRAME_HEADER.unpack(await self.read(FRAME_HEADER.size))
+                payload = await self.read(length)
+            except asyncio.IncompleteReadError:
+                return
+
+            if kind == KEYFRAME and length == size:
+                framebuffer = payload
+            elif kind == DELTA:
+                framebuffer = xor_bytes(framebuffer, rle_decode(payload, size))
+            else:
+                raise InvalidStreamError(f"unexpected frame of kind {kind} and {length} bytes")
+            yield sequence, milliseconds, framebuffer
+
+    def send_key(self, key: int, pressed: bool):
+        assert self.writer is not None, "Saved streams do not take input"
+        self.writer.write(KEY_EVENT.pack(key, pressed))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import struct
+import time
+from typing import Optional, Set, Tuple
+from emulator.Delta import rle_encode, xor_bytes
+from emulator.Display import Display
+from emulator.KeyBoard import KeyBoard, NUM_KEYS
+from emulator.Presenter import FRAME_RATE
+from emulator.Renderer import Renderer
+
+STREAM_MAGIC = b"C8FS"
+STREAM_VERSION = 2
+# magic, version, display width, display height, display planes
+STREAM_HELLO = struct.Struct("<4sHHHB")
+# kind, sequence number, milliseconds since the stream started, payload length
+FRAME_HEADER = struct.Struct("<BIII")
+# key, pressed; sent by clients
+KEY_EVENT = struct.Struct("<BB")
+
+KEYFRAME = 1
+DELTA = 2
+
+# Deltas are cheap, keyframes let a saved stream be cut anywhere.
+KEYFRAME_INTERVAL = 300
+# Clients with more than this much unsent data skip deltas and get a
+# keyframe once they catch up.
+MAX_CLIENT_BACKLOG = 64 * 1024
+
+UNIX_PREFIX = "unix:"
+DEFAULT_ADDRESS = "127.0.0.1:6464"
+
+
+# "unix:/path/to/socket" or "host:port"
+def parse_address(address: str) -> Tuple[str, Optional[int]]:
+    if address.startswith(UNIX_PREFIX):
+        return address[len(UNIX_PREFIX):], None
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+# Publishes the display of a session to local clients. Renders only flag the
+# frame as changed, the frame itself is sent at most frame_rate times a
+# second as the XOR against the last one sent, run-length encoded. A frame
+# that did not change is not sent at all, so an idle session costs nothing.
+class StreamServer(Renderer):
+    def __init__(self, display: Display, keyboard: KeyBoard, frame_rate: int = FRAME_RATE):
+        self.display = display
+        self.keyboard = keyboard
+        self.frame_duration = 1 / frame_rate
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self.lagging: Set[asyncio.StreamWriter] = set()
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.previous = self.display.to_bytes()
+        self.changed = False
+        self.sequence = 0
+        self.started = time.perf_counter()
+        self.display.attach(self)
+
+    def render(self, display: Display):
+        self.changed = True
+
+    async def start(self, address: str):
+        host, port = parse_address(address)
+        if port is None:
+            self.server = await asyncio.start_unix_server(self.handle_client, host)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port)
+
+    async def serve(self):
+        while True:
+            self.publish()
+            await asyncio.sleep(self.frame_duration)
+
+    def close(self):
+        self.display.detach(self)
+        if self.server is not None:
+            self.server.close()
+        for client in self.clients:
+            client.close()
+
+    def publish(self):
+        if self.changed:
+            self.changed = False
+            current = self.display.to_bytes()
+            if current != self.previous:
+                self.sequence += 1
+                keyframe = self.sequence % KEYFRAME_INTERVAL == 0
+                delta = None if keyframe else rle_encode(xor_bytes(current, self.previous))
+                self.previous = current
+                for client in list(self.clients - self.lagging):
+                    if delta is None:
+                        self.send(client, KEYFRAME, current)
+                    else:
+                        self.send(client, DELTA, delta)
+
+        for client in list(self.lagging):
+            if client.transport.get_write_buffer_size() <= MAX_CLIENT_BACKLOG:
+                self.lagging.discard(client)
+                self.send(client, KEYFRAME, self.previous)
+
+    def send(self, client: asyncio.StreamWriter, kind: int, payload: bytes):
+        if client.transport.get_write_buffer_size() > MAX_CLIENT_BACKLOG:
+            self.lagging.add(client)
+            return
+        milliseconds = int((time.perf_counter() - self.started) * 1000)
+        client.write(FRAME_HEADER.pack(kind, self.sequence, milliseconds, len(payload)) + payload)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        display = self.display
+        writer.write(STREAM_HELLO.pack(STREAM_MAGIC, STREAM_VERSION, display.get_width(), display.get_height(), display.num_planes))
+        self.send(writer, KEYFRAME, self.previous)
+        self.clients.add(writer)
+        try:
+            while True:
+                key, pressed = KEY_EVENT.unpack(await reader.readexactly(KEY_EVENT.size))
+                if key >= NUM_KEYS:
+                    logging.warning(f"stream client sent invalid key {key}")
+                    break
+                if pressed:
+                    self.keyboard.press(key)
+                else:
+                    self.keyboard.release(key)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # The event loop is shutting down with the client still connected.
+            pass
+        finally:
+            self.clients.discard(writer)
+            self.lagging.discard(writer)
+            writer.close()
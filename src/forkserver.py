@@ -0,0 +1,33 @@
+import argparse
+import logging
+import time
+from pathlib import Path
+from emulator.ForkServer import ForkServer
+from emulator.Scheduler import DEFAULT_INSTRUCTIONS_PER_FRAME
+
+ROMS_DIRECTORY = Path("roms")
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start streaming sessions on request by forking a pre-initialized emulator")
+    parser.add_argument("socket", type=Path, help="Unix socket to take session requests on")
+    parser.add_argument("--preload", action="append", default=[], help="rom to set up ahead of requests, may be repeated")
+    parser.add_argument("--preload-all", action="store_true", help="set up every rom of the roms directory ahead of requests")
+    parser.add_argument("--speed", type=int, default=DEFAULT_INSTRUCTIONS_PER_FRAME, help="instructions per frame of sessions that do not ask for a speed")
+    args = parser.parse_args()
+
+    names = sorted(path.name for path in ROMS_DIRECTORY.iterdir()) if args.preload_all else args.preload
+    server = ForkServer(ROMS_DIRECTORY, args.speed)
+    start = time.perf_counter()
+    server.preload(names)
+    print(f"preloaded {len(names)} roms in {time.perf_counter() - start:.2f}s, listening on {args.socket}")
+    try:
+        server.serve(args.socket)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,186 @@
-import sys
+import argparse
+import asyncio
 import logging
+import sys
+import time
 import pygame
 from pathlib import Path
-from emulator.Chip8 import Chip8
+from emulator.AnalysisCache import AnalysisCache
+from emulator.AsyncRunner import AsyncRunner
+from emulator.AudioSink import AudioSink
+from emulator.BlockEngine import BlockEngine
+from emulator.Chip8 import Chip8, create_display
+from emulator.CoreProcess import CoreProcess
+from emulator.InputRecorder import InputRecorder
+from emulator.KeyBoard import KeyBoard
+from emulator.MovieInput import MovieInput
+from emulator.NullAudio import NullAudio
+from emulator.Presenter import Presenter
+from emulator.Profiler import Profiler
+from emulator.PygameAudio import PygameAudio
+from emulator.PygameInput import PygameInput
+from emulator.PygameRenderer import PygameRenderer
+from emulator.QuirkProfile import QuirkProfile, PROFILES
+from emulator.RewindBuffer import RewindBuffer
 from emulator.Rom import Rom
+from emulator.SaveState import SaveState, InvalidSaveStateError
+from emulator.Scheduler import Scheduler, DEFAULT_INSTRUCTIONS_PER_FRAME
 
 pygame.init()
 logging.basicConfig(level=logging.WARNING)
 
-TIMER_EVENT = pygame.USEREVENT + 1
-pygame.time.set_timer(TIMER_EVENT, 15)
+TRACE_SIZE = 4096
+WINDOW_WIDTH = 640
+
+parser = argparse.ArgumentParser(description="Chip8 emulator")
+parser.add_argument("rom", help="a valid game from the roms directory")
+parser.add_argument("--speed", type=int, default=DEFAULT_INSTRUCTIONS_PER_FRAME, help="instructions executed per 60 Hz frame")
+parser.add_argument("--turbo", action="store_true", help="run as fast as possible instead of in real time")
+parser.add_argument("--interpreter", action="store_true", help="use the reference interpreter instead of the block engine")
+parser.add_argument("--profile", action="store_true", help="profile the reference interpreter and print a report on exit, needs --interpreter")
+parser.add_argument("--trace", type=Path, help="keep a trace of recent instructions and write it to this file on crash, needs --interpreter")
+parser.add_argument("--record", type=Path, help="record the keys pressed on every frame to this movie file")
+parser.add_argument("--replay", type=Path, help="play back the keys of a recorded movie file")
+parser.add_argument("--blend", action="store_true", help="blend the last two frames to reduce sprite flicker")
+parser.add_argument("--frame-skip", type=int, default=0, help="frames that may be dropped in a row when rendering falls behind")
+parser.add_argument("--quirks", choices=sorted(PROFILES), help="quirk profile to run under, by default the one known for the rom")
+parser.add_argument("--multiprocess", action="store_true", help="run the emulator core in its own process, the window only presents")
+parser.add_argument("--mute", action="store_true", help="do not sound the buzzer")
+args = parser.parse_args()
+if args.multiprocess and (args.profile or args.trace or args.record or args.replay):
+    parser.error("--multiprocess cannot be combined with --profile, --trace, --record or --replay")
+# Only the interpreter executes instructions one by one for the profiler to see.
+if (args.profile or args.trace) and not args.interpreter:
+    parser.error("--profile and --trace instrument the reference interpreter, they need --interpreter")
+
+
+rom = Rom(Path("roms", args.rom))
+profile = PROFILES[args.quirks] if args.quirks else None
+save_state_path = Path(f"{args.rom}.state")
+
+# The window is sized for the profile the machine will run under.
+display = create_display(profile or QuirkProfile.for_rom(rom))
+presenter = Presenter(display, args.blend, args.frame_skip)
+presenter.attach(PygameRenderer(display.get_width(), display.get_height(), WINDOW_WIDTH // display.get_width()))
+
+
+def create_audio() -> AudioSink:
+    if args.mute:
+        return NullAudio()
+    try:
+        return PygameAudio()
+    except pygame.error as error:
+        logging.warning(f"no sound: {error}")
+        return NullAudio()
+
+
+audio = create_audio()
+
+
+# The window only forwards the keypad to the core process and presents the
+# latest frame it published.
+def run_front_end():
+    core = CoreProcess(rom, args.speed, not args.interpreter, args.turbo, profile)
+    closed = False
+
+    def handle_front_end_event(event: pygame.event.Event):
+        nonlocal closed
+        if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            closed = True
 
+    keyboard = KeyBoard(PygameInput(handle_front_end_event))
+    sequence = None
+    deadline = time.perf_counter()
+    core.start()
+    try:
+        while core.is_alive() and not closed:
+            keyboard.poll()
+            core.shared.set_keys(keyboard.get_state())
+            audio.update(core.shared.sound_playing())
+            latest, framebuffer = core.shared.read()
+            if latest != sequence:
+                sequence = latest
+                display.load_bytes(framebuffer)
+            presenter.present()
 
-if len(sys.argv) < 2:
-    print("A valid game from the roms directory must be given in argument")
-    exit(1)
+            deadline += presenter.frame_duration
+            delay = deadline - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                deadline = time.perf_counter()
+    finally:
+        core.stop()
 
 
-rom = Rom(Path("roms", sys.argv[1]))
+if args.multiprocess:
+    run_front_end()
+    sys.exit()
 
-chip8 = Chip8()
+
+def handle_event(event: pygame.event.Event):
+    if event.type == pygame.QUIT:
+        scheduler.stop()
+    elif event.type != pygame.KEYDOWN:
+        return
+    elif event.key == pygame.K_ESCAPE:
+        scheduler.stop()
+    elif event.key == pygame.K_F5:
+        SaveState.capture(chip8).write(save_state_path)
+    elif event.key == pygame.K_F9:
+        load_save_state()
+
+
+live_input = PygameInput(handle_event)
+input_source = MovieInput(args.replay) if args.replay else live_input
+# Recording a replay copies the movie, up to where the session stopped.
+if args.record:
+    input_source = InputRecorder(input_source)
+
+chip8 = Chip8(display, KeyBoard(input_source), profile=profile)
 chip8.load_rom(rom) 
+engine = chip8
+if not args.interpreter:
+    engine = BlockEngine(chip8)
+    engine.pretranslate(AnalysisCache().load(rom).blocks)
+
+profiler = None
+if args.profile or args.trace:
+    profiler = Profiler(chip8, TRACE_SIZE if args.trace else 0, args.trace)
+    profiler.attach()
+
+rewind_buffer = RewindBuffer()
+
+
+def load_save_state():
+    try:
+        SaveState.read(save_state_path).restore(chip8)
+        rewind_buffer.clear()
+    except (OSError, InvalidSaveStateError) as error:
+        logging.warning(f"cannot load {save_state_path}: {error}")
+
+
+def poll_input():
+    if args.replay:
+        # The movie drives the keypad, the window still needs its events handled.
+        live_input.poll(KeyBoard())
+
+    if pygame.key.get_pressed()[pygame.K_BACKSPACE]:
+        rewind_buffer.rewind(chip8)
+    else:
+        rewind_buffer.push(chip8)
+
+
+scheduler = Scheduler(chip8, engine, args.speed, args.turbo, poll_input, presenter, audio)
+if args.turbo:
+    scheduler.run()
+else:
+    runner = AsyncRunner()
+    runner.add(scheduler)
+    asyncio.run(runner.run())
 
-while True:
-    chip8.step()
+if args.record:
+    input_source.save(args.record)
 
-    for event in pygame.event.get():
-        if event.type in { pygame.QUIT, pygame.K_ESCAPE }:
-            exit()
-        elif event.type == TIMER_EVENT:
-            chip8.update_timers()
-    pygame.time.wait(1)
\ No newline at end of file
+if args.profile:
+    print(profiler.report())
@@ -0,0 +1,164 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+from benchmark import default_script
+from emulator.BlockEngine import BlockEngine
+from emulator.Chip8 import Chip8, SCREEN_WIDTH, SCREEN_HEIGHT
+from emulator.Display import Display
+from emulator.KeyBoard import KeyBoard
+from emulator.MovieInput import MovieInput
+from emulator.Rom import Rom
+from emulator.SaveState import SaveState
+from emulator.Scheduler import Scheduler
+from emulator.ScriptedInput import ScriptedInput
+
+ROMS_DIRECTORY = Path("roms")
+GOLDEN_VERSION = 1
+DEFAULT_FRAMES = 600
+DEFAULT_INTERVAL = 10
+DEFAULT_INSTRUCTIONS_PER_FRAME = 100
+HASH_LENGTH = 16
+
+# A checkpoint is [frame, program counter, framebuffer hash, machine state hash].
+Checkpoint = List
+
+
+def short_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()[:HASH_LENGTH]
+
+
+# Cases come from a JSON list of {"name", "rom", "script" or "movie", "seed"}
+# objects, rom and movie paths relative to the case file. Without one every
+# rom of the roms directory runs with the default benchmark script.
+def load_cases(path: Optional[Path], frames: int) -> List[dict]:
+    if path is None:
+        return [
+            {"name": rom.name, "rom": str(rom), "script": default_script(frames), "seed": 0}
+            for rom in sorted(ROMS_DIRECTORY.iterdir())
+        ]
+
+    with path.open() as case_file:
+        cases = json.load(case_file)
+    for case in cases:
+        case["rom"] = str(path.parent / case["rom"])
+        if "movie" in case:
+            case["movie"] = str(path.parent / case["movie"])
+        case.setdefault("name", Path(case["rom"]).name)
+        case.setdefault("seed", 0)
+    return cases
+
+
+def run_case(case: dict, frames: int, interval: int, use_blocks: bool, instructions_per_frame: int) -> dict:
+    if "movie" in case:
+        source = MovieInput(Path(case["movie"]))
+    else:
+        source = ScriptedInput([tuple(press) for press in case.get("script", [])])
+
+    chip8 = Chip8(Display(SCREEN_WIDTH, SCREEN_HEIGHT), KeyBoard(source), case["seed"])
+    checkpoints: List[Checkpoint] = []
+    try:
+        chip8.load_rom(Rom(Path(case["rom"])))
+        engine = BlockEngine(chip8) if use_blocks else chip8
+        scheduler = Scheduler(chip8, engine, instructions_per_frame, turbo=True)
+        for frame in range(1, frames + 1):
+            scheduler.run_frame()
+            if frame % interval == 0 or frame == frames:
+                checkpoints.append([
+                    frame, chip8.cpu.program_counter,
+                    short_hash(chip8.display.to_bytes()), short_hash(SaveState.capture(chip8).payload),
+                ])
+    except Exception as error:
+        return {
+            "checkpoints": checkpoints,
+            "error": f"{type(error).__name__}: {error}",
+            "error_pc": chip8.cpu.program_counter,
+        }
+    return {"checkpoints": checkpoints}
+
+
+# Describes how a run differs from its golden result, or returns None.
+def compare(result: dict, golden: dict) -> Optional[str]:
+    last_match = 0
+    for current, expected in zip(result["checkpoints"], golden["checkpoints"]):
+        if current != expected:
+            frame, pc, framebuffer, _ = current
+            what = "framebuffer" if framebuffer != expected[2] else "machine state"
+            if pc != expected[1]:
+                what += f", pc {expected[1]:#05x} expected"
+            return f"diverged by frame {frame} (after frame {last_match}) at pc {pc:#05x}: {what}"
+        last_match = current[0]
+
+    if result.get("error") != golden.get("error"):
+        if "error" in result:
+            return f"failed after frame {last_match} at pc {result['error_pc']:#05x}: {result['error']}"
+        return f"no longer fails with {golden['error']}"
+    if len(result["checkpoints"]) != len(golden["checkpoints"]):
+        return f"ran {len(result['checkpoints'])} checkpoints, golden has {len(golden['checkpoints'])}"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run rom and input script pairs in parallel and check them against golden hashes")
+    parser.add_argument("golden", type=Path, help="golden results file to check against, or to write with --update")
+    parser.add_argument("--cases", type=Path, help="JSON list of cases, defaults to every rom in the roms directory")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES, help="frames to run per case")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="frames between checkpoints")
+    parser.add_argument("--speed", type=int, default=DEFAULT_INSTRUCTIONS_PER_FRAME, help="instructions executed per frame")
+    parser.add_argument("--interpreter", action="store_true", help="run the reference interpreter instead of the block engine")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--update", action="store_true", help="write the results as the new golden file")
+    args = parser.parse_args()
+
+    cases = load_cases(args.cases, args.frames)
+    names = [case["name"] for case in cases]
+    assert len(set(names)) == len(names), "Case names must be unique"
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.jobs) as executor:
+        futures = [
+            executor.submit(run_case, case, args.frames, args.interval, not args.interpreter, args.speed)
+            for case in cases
+        ]
+        results = {name: future.result() for name, future in zip(names, futures)}
+    elapsed = time.perf_counter() - start
+
+    # Results only compare under the same settings: the engines split frames
+    # at different instructions.
+    settings = {
+        "engine": "interpreter" if args.interpreter else "blocks",
+        "frames": args.frames,
+        "interval": args.interval,
+        "instructions_per_frame": args.speed,
+    }
+    if args.update:
+        with args.golden.open("w") as golden_file:
+            json.dump({"version": GOLDEN_VERSION, **settings, "cases": results}, golden_file, indent=1)
+        print(f"wrote {len(results)} cases to {args.golden} in {elapsed:.1f}s")
+        return
+
+    with args.golden.open() as golden_file:
+        golden = json.load(golden_file)
+    assert golden["version"] == GOLDEN_VERSION, "Unsupported golden file version"
+    for setting, value in settings.items():
+        if golden[setting] != value:
+            parser.error(f"golden file was made with {setting} {golden[setting]}, not {value}")
+
+    failures = 0
+    for name, result in results.items():
+        expected = golden["cases"].get(name)
+        problem = "missing from the golden file" if expected is None else compare(result, expected)
+        if problem is not None:
+            failures += 1
+            print(f"{name:<20} {problem}")
+    print(f"{len(results) - failures}/{len(results)} cases match in {elapsed:.1f}s")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import asyncio
+from pathlib import Path
+from emulator.AsyncRunner import AsyncRunner
+from emulator.BlockEngine import BlockEngine
+from emulator.Chip8 import Chip8, SCREEN_WIDTH, SCREEN_HEIGHT
+from emulator.Display import Display
+from emulator.KeyBoard import KeyBoard
+from emulator.QuirkProfile import PROFILES
+from emulator.Rom import Rom
+from emulator.Scheduler import Scheduler, DEFAULT_INSTRUCTIONS_PER_FRAME
+from emulator.StreamServer import StreamServer, DEFAULT_ADDRESS
+
+
+async def serve(args):
+    profile = PROFILES[args.quirks] if args.quirks else None
+    chip8 = Chip8(Display(SCREEN_WIDTH, SCREEN_HEIGHT), KeyBoard(), profile=profile)
+    chip8.load_rom(Rom(Path("roms", args.rom)))
+    engine = chip8 if args.interpreter else BlockEngine(chip8)
+
+    server = StreamServer(chip8.display, chip8.keyboard)
+    await server.start(args.listen)
+    runner = AsyncRunner()
+    runner.add(Scheduler(chip8, engine, args.speed))
+    try:
+        await asyncio.gather(runner.run(), server.serve())
+    finally:
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a rom headlessly and stream its display to local clients")
+    parser.add_argument("rom", help="a valid game from the roms directory")
+    parser.add_argument("--listen", default=DEFAULT_ADDRESS, help="host:port or unix:/path/to/socket to listen on")
+    parser.add_argument("--speed", type=int, default=DEFAULT_INSTRUCTIONS_PER_FRAME, help="instructions executed per 60 Hz frame")
+    parser.add_argument("--quirks", choices=sorted(PROFILES), help="quirk profile to run under, by default the one known for the rom")
+    parser.add_argument("--interpreter", action="store_true", help="use the reference interpreter instead of the block engine")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
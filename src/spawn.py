@@ -0,0 +1,33 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+from emulator.ForkServer import SessionRequestError, request_session
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ask a fork server for a new streaming session")
+    parser.add_argument("socket", type=Path, help="Unix socket of the fork server")
+    parser.add_argument("rom", help="a valid game from the roms directory")
+    parser.add_argument("--listen", help="host:port or unix:/path/to/socket for the session to stream on")
+    parser.add_argument("--speed", type=int, help="instructions executed per 60 Hz frame")
+    parser.add_argument("--frames", type=int, help="frames to run before the session exits, runs until killed by default")
+    parser.add_argument("--seed", type=int, help="random seed of the session")
+    parser.add_argument("--interpreter", action="store_true", help="use the reference interpreter instead of the block engine")
+    args = parser.parse_args()
+
+    request = {"rom": args.rom, "interpreter": args.interpreter}
+    for field in ("listen", "speed", "frames", "seed"):
+        if getattr(args, field) is not None:
+            request[field] = getattr(args, field)
+
+    start = time.perf_counter()
+    try:
+        session = request_session(args.socket, request)
+    except (OSError, SessionRequestError) as error:
+        sys.exit(f"cannot start a session: {error}")
+    print(f"session {session['pid']} streaming on {session['address']}, ready in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
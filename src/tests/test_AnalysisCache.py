@@ -0,0 +1,41 @@
+import tempfile
+import unittest
+from pathlib import Path
+from emulator.AnalysisCache import AnalysisCache
+from emulator.QuirkProfile import ROM_PROFILES
+from emulator.Rom import Rom
+
+ROM_PATH = Path(__file__).resolve().parents[2] / "roms" / "BLINKY"
+
+
+class AnalysisCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = AnalysisCache(Path(self.directory.name))
+        self.rom = Rom(ROM_PATH)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reuses_stored_analysis(self):
+        analysis = self.cache.load(self.rom)
+        path = self.cache.path(analysis.sha1, analysis.profile.name)
+        self.assertTrue(path.is_file())
+        self.assertEqual(self.cache.load(self.rom).to_dict(), analysis.to_dict())
+
+    def test_profile_change_analyzes_again(self):
+        sha1 = self.rom.sha1()
+        profile = ROM_PROFILES[sha1]
+        ROM_PROFILES[sha1] = "schip"
+        try:
+            self.assertEqual(self.cache.load(self.rom).profile.name, "schip")
+        finally:
+            ROM_PROFILES[sha1] = profile
+
+        analysis = self.cache.load(self.rom)
+        self.assertEqual(analysis.profile.name, profile)
+        self.assertEqual(len(list(Path(self.directory.name).iterdir())), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
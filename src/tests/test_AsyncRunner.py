@@ -0,0 +1,73 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from emulator.AsyncRunner import AsyncRunner
+from emulator.Chip8 import Chip8, SCREEN_HEIGHT, SCREEN_WIDTH
+from emulator.Display import Display
+from emulator.InputRecorder import InputRecorder
+from emulator.KeyBoard import KeyBoard
+from emulator.MovieInput import MovieInput
+from emulator.Renderer import Renderer
+from emulator.Rom import Rom
+from emulator.SaveState import SaveState
+from emulator.Scheduler import Scheduler
+from emulator.ScriptedInput import ScriptedInput
+
+ROM_PATH = Path(__file__).resolve().parents[2] / "roms" / "BRIX"
+FRAMES = 180
+FRAME_RATE = 120
+
+
+# Stalls every few frames, like a window that is being dragged around.
+class StallingRenderer(Renderer):
+    def __init__(self):
+        self.frames = 0
+
+    def render(self, display):
+        self.frames += 1
+        if self.frames % 11 == 0:
+            time.sleep(0.05)
+
+
+def create_machine(source) -> Chip8:
+    chip8 = Chip8(Display(SCREEN_WIDTH, SCREEN_HEIGHT), KeyBoard(source), seed=0)
+    chip8.load_rom(Rom(ROM_PATH))
+    return chip8
+
+
+class AsyncRunnerTest(unittest.TestCase):
+    def test_recording_replays_despite_stalls(self):
+        presses = [(frame, 0x4 if frame % 40 < 20 else 0x6, 5) for frame in range(0, FRAMES, 10)]
+        recorder = InputRecorder(ScriptedInput(presses))
+        recorded = create_machine(recorder)
+        recorded.display.attach(StallingRenderer())
+        scheduler = Scheduler(recorded, instructions_per_frame=20)
+        # Every tick must see exactly the polls of the frames before it and
+        # its own.
+        misaligned = []
+        tick = scheduler.tick
+
+        def checked_tick():
+            if len(recorder.states) != scheduler.frame + 1:
+                misaligned.append(scheduler.frame)
+            tick()
+
+        scheduler.tick = checked_tick
+        runner = AsyncRunner(FRAME_RATE)
+        runner.add(scheduler)
+        asyncio.run(runner.run(FRAMES))
+        self.assertEqual(misaligned, [])
+        self.assertEqual(len(recorder.states), FRAMES)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "brix.movie"
+            recorder.save(path)
+            replayed = create_machine(MovieInput(path))
+        Scheduler(replayed, instructions_per_frame=20, turbo=True).run(FRAMES)
+        self.assertEqual(SaveState.capture(replayed).payload, SaveState.capture(recorded).payload)
+
+
+if __name__ == "__main__":
+    unittest.main()
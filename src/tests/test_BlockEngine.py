@@ -0,0 +1,50 @@
+import unittest
+from pathlib import Path
+from typing import Optional, Tuple
+from benchmark import default_script
+from emulator.BlockEngine import BlockEngine
+from emulator.Chip8 import Chip8, create_display
+from emulator.KeyBoard import KeyBoard
+from emulator.QuirkProfile import QuirkProfile
+from emulator.Rom import Rom
+from emulator.SaveState import SaveState
+from emulator.Scheduler import Scheduler
+from emulator.ScriptedInput import ScriptedInput
+
+ROMS_DIRECTORY = Path(__file__).resolve().parents[2] / "roms"
+FRAMES = 300
+INSTRUCTIONS_PER_FRAME = 100
+
+
+# Runs a rom for FRAMES frames and returns the final machine state, the
+# error it stopped on if any, and the instructions fast-forwarded.
+def run(rom: Rom, detect_idle: bool) -> Tuple[bytes, Optional[str], int]:
+    chip8 = Chip8(create_display(QuirkProfile.for_rom(rom)), KeyBoard(ScriptedInput(default_script(FRAMES))), seed=0)
+    engine = BlockEngine(chip8, detect_idle)
+    error = None
+    try:
+        chip8.load_rom(rom)
+        Scheduler(chip8, engine, INSTRUCTIONS_PER_FRAME, turbo=True).run(FRAMES)
+    except Exception as exception:
+        error = f"{type(exception).__name__}: {exception}"
+    return SaveState.capture(chip8).payload, error, engine.idle_instructions
+
+
+class BlockEngineTest(unittest.TestCase):
+    # Fast-forwarding spin loops must land every rom in the state running
+    # each instruction reaches.
+    def test_idle_detection_changes_nothing(self):
+        skipped = 0
+        for path in sorted(ROMS_DIRECTORY.iterdir()):
+            with self.subTest(rom=path.name):
+                rom = Rom(path)
+                state, error, idle = run(rom, True)
+                expected_state, expected_error, _ = run(rom, False)
+                self.assertEqual(error, expected_error)
+                self.assertEqual(state, expected_state)
+                skipped += idle
+        self.assertGreater(skipped, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+from typing import List
+from emulator.Chip8 import Chip8, create_display
+from emulator.QuirkProfile import PROFILES
+
+SPRITE_ADDRESS = 0x300
+
+
+# Loads a program of opcodes and sprite data at SPRITE_ADDRESS, then runs
+# the given number of steps, by default one per opcode.
+def run(profile_name: str, opcodes: List[int], sprite: bytes = b"", steps: int = -1) -> Chip8:
+    profile = PROFILES[profile_name]
+    chip8 = Chip8(create_display(profile), seed=0, profile=profile)
+    program = b"".join(opcode.to_bytes(2, "big") for opcode in opcodes)
+    chip8.memory.write(0x200, program)
+    chip8.memory.write(SPRITE_ADDRESS, sprite)
+    chip8.rom_length = len(program)
+    for _ in range(len(opcodes) if steps < 0 else steps):
+        chip8.step()
+    return chip8
+
+
+def lit(chip8: Chip8, plane: int = 0) -> List[tuple]:
+    display = chip8.display
+    rows = display.planes[plane]
+    return [(x, y) for y in range(display.height) for x in range(display.width) if rows[y] >> (display.width - 1 - x) & 1]
+
+
+class ExtendedTest(unittest.TestCase):
+    def test_big_sprite_in_high_resolution(self):
+        program = [0x00FF, 0xA300, 0xD010, 0xD010]
+        chip8 = run("schip", program, bytes([0xFF]) * 32, steps=3)
+        self.assertEqual(chip8.display.rows[:17], [0xFFFF << 112] * 16 + [0])
+        self.assertEqual(chip8.cpu.v[0xF], 0)
+        chip8.step()
+        self.assertEqual(chip8.cpu.v[0xF], 1)
+        self.assertEqual(lit(chip8), [])
+
+    def test_low_resolution_doubles_pixels(self):
+        chip8 = run("schip", [0x6001, 0xA300, 0xD011], b"\x80")
+        self.assertEqual((chip8.display.width, chip8.display.height), (128, 64))
+        self.assertEqual(lit(chip8), [(2, 0), (3, 0), (2, 1), (3, 1)])
+
+    def test_scrolls(self):
+        draw = [0x00FF, 0x6004, 0x6104, 0xA300, 0xD011]
+        self.assertEqual(lit(run("schip", draw + [0x00C3], b"\x80")), [(4, 7)])
+        self.assertEqual(lit(run("schip", draw + [0x00FB], b"\x80")), [(8, 4)])
+        self.assertEqual(lit(run("schip", draw + [0x00FC], b"\x80")), [(0, 4)])
+        self.assertEqual(lit(run("xochip", draw + [0x00D3], b"\x80")), [(4, 1)])
+        # Low resolution scrolls in doubled pixels.
+        self.assertEqual(lit(run("schip", [0xA300, 0xD011, 0x00C1], b"\x80")), [(0, 2), (1, 2), (0, 3), (1, 3)])
+
+    def test_scroll_drops_pixels_past_the_edge(self):
+        self.assertEqual(lit(run("schip", [0x00FF, 0x613F, 0xA300, 0xD011, 0x00C1], b"\x80")), [])
+
+    def test_planes(self):
+        draw = [0x00FF, 0xA300, 0xD001]
+        chip8 = run("xochip", [0xF201] + draw, b"\x80\x40")
+        self.assertEqual((lit(chip8, 0), lit(chip8, 1)), ([], [(0, 0)]))
+        # Both planes take a sprite each, one after the other.
+        chip8 = run("xochip", [0xF301] + draw, b"\x80\x40")
+        self.assertEqual((lit(chip8, 0), lit(chip8, 1)), ([(0, 0)], [(1, 0)]))
+        self.assertEqual(chip8.display.row_bytes(0)[:2], b"\x01\x02")
+        # Clearing only touches the selected planes.
+        chip8 = run("xochip", [0xF301] + draw + [0xF101, 0x00E0], b"\x80\x40")
+        self.assertEqual((lit(chip8, 0), lit(chip8, 1)), ([], [(1, 0)]))
+
+    def test_long_index_load(self):
+        chip8 = run("xochip", [0xF000, 0x1234, 0x6107], steps=2)
+        self.assertEqual(chip8.cpu.index, 0x1234)
+        self.assertEqual(chip8.cpu.v[1], 7)
+
+    def test_skips_step_over_long_load(self):
+        taken = [0x6005, 0x3005, 0xF000, 0x1234, 0x6107]
+        chip8 = run("xochip", taken, steps=3)
+        self.assertEqual((chip8.cpu.index, chip8.cpu.v[1]), (0, 7))
+        chip8 = run("xochip", taken[:1] + [0x3006] + taken[2:], steps=4)
+        self.assertEqual((chip8.cpu.index, chip8.cpu.v[1]), (0x1234, 7))
+        # Other profiles skip a single word.
+        self.assertEqual(run("schip", taken, steps=2).cpu.program_counter, 0x206)
+        self.assertEqual(run("xochip", taken, steps=2).cpu.program_counter, 0x208)
+
+    def test_long_skips_of_every_kind(self):
+        # V0 = 5, V1 = 5, then each skip is taken over F000 nnnn.
+        for skip in (0x3005, 0x4006, 0x5010, 0x9020, 0xE0A1):
+            chip8 = run("xochip", [0x6005, 0x6105, skip, 0xF000, 0x1234], steps=3)
+            self.assertEqual(chip8.cpu.program_counter, 0x20A, f"{skip:04x}")
+
+    def test_flags_round_trip(self):
+        chip8 = run("schip", [0x6011, 0x6122, 0xF175, 0x6000, 0x6100, 0xF185])
+        self.assertEqual(list(chip8.cpu.v[:2]), [0x11, 0x22])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from emulator.Delta import rle_decode, rle_encode, xor_bytes
+
+
+class DeltaTest(unittest.TestCase):
+    def test_rle_round_trip(self):
+        cases = [
+            b"",
+            bytes(64),
+            b"\x01\x02\x03",
+            b"\x00" * 10 + b"\x05" + b"\x00" * 3 + b"\x06" + b"\x00" * 20 + b"\x07\x08",
+            bytes(range(256)) * 4,
+        ]
+        for data in cases:
+            self.assertEqual(rle_decode(rle_encode(data), len(data)), data)
+
+    def test_rle_skips_zeros(self):
+        data = bytes(4096)
+        self.assertEqual(rle_encode(data), b"")
+        self.assertLess(len(rle_encode(data[:-1] + b"\x01")), 16)
+
+    def test_xor_round_trip(self):
+        before = bytes(range(256))
+        after = bytes(reversed(range(256)))
+        delta = xor_bytes(before, after)
+        self.assertEqual(xor_bytes(before, delta), after)
+        self.assertEqual(xor_bytes(after, delta), before)
+        self.assertEqual(xor_bytes(before, before), bytes(256))
+
+    def test_delta_round_trip(self):
+        before = bytes(100) + b"\x10\x20\x30" + bytes(100)
+        after = bytes(100) + b"\x10\x21\x30" + bytes(99) + b"\x01"
+        encoded = rle_encode(xor_bytes(before, after))
+        self.assertEqual(xor_bytes(before, rle_decode(encoded, len(before))), after)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from emulator.Display import Display
+
+
+class DisplayTest(unittest.TestCase):
+    def test_draw_sets_pixels(self):
+        display = Display(64, 32)
+        self.assertFalse(display.draw_sprite(3, 2, [0b10100000, 0b01000000]))
+        self.assertEqual(display.get_pixel(3, 2), 1)
+        self.assertEqual(display.get_pixel(4, 2), 0)
+        self.assertEqual(display.get_pixel(5, 2), 1)
+        self.assertEqual(display.get_pixel(4, 3), 1)
+
+    def test_redraw_erases_and_collides(self):
+        display = Display(64, 32)
+        display.draw_sprite(10, 10, [0xFF])
+        self.assertTrue(display.draw_sprite(10, 10, [0x81]))
+        self.assertEqual(display.rows[10], 0x7E << (64 - 18))
+
+    def test_disjoint_draw_does_not_collide(self):
+        display = Display(64, 32)
+        display.draw_sprite(0, 0, [0xF0])
+        self.assertFalse(display.draw_sprite(4, 0, [0xF0]))
+        self.assertFalse(display.draw_sprite(0, 1, [0xF0]))
+
+    def test_wraps_around_the_right_edge(self):
+        display = Display(64, 32)
+        display.draw_sprite(60, 0, [0xFF])
+        self.assertEqual([display.get_pixel(x, 0) for x in (59, 60, 63, 0, 3, 4)], [0, 1, 1, 1, 1, 0])
+        # The wrapped part collides too.
+        self.assertTrue(display.draw_sprite(2, 0, [0x80]))
+
+    def test_wraps_around_the_bottom_edge(self):
+        display = Display(64, 32)
+        display.draw_sprite(0, 30, [0x80] * 4)
+        self.assertEqual([display.get_pixel(0, y) for y in (29, 30, 31, 0, 1, 2)], [0, 1, 1, 1, 1, 0])
+
+    def test_coordinates_wrap(self):
+        display = Display(64, 32)
+        display.draw_sprite(64 + 5, 0, [0x80])
+        self.assertEqual(display.get_pixel(5, 0), 1)
+
+    def test_wide_lines_on_planes(self):
+        display = Display(128, 64, 2)
+        display.draw_sprite(120, 0, [0xFFFF], line_width=16, plane=1)
+        self.assertEqual(display.planes[0][0], 0)
+        self.assertEqual(display.planes[1][0], (0xFF << 120) | 0xFF)
+        self.assertEqual(display.row_bytes(0)[:8], b"\x02" * 8)
+
+    def test_bytes_round_trip(self):
+        display = Display(64, 32)
+        display.draw_sprite(7, 9, [0xA5, 0x5A, 0xFF])
+        other = Display(64, 32)
+        other.load_bytes(display.to_bytes())
+        self.assertEqual(other.rows, display.rows)
+        self.assertEqual(other.hash(), display.hash())
+
+
+if __name__ == "__main__":
+    unittest.main()
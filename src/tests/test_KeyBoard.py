@@ -0,0 +1,21 @@
+import unittest
+from emulator.KeyBoard import KeyBoard
+
+
+class KeyBoardTest(unittest.TestCase):
+    def test_state_round_trip(self):
+        keyboard = KeyBoard()
+        keyboard.set_state(0x8421)
+        self.assertEqual(keyboard.get_state(), 0x8421)
+        self.assertEqual(keyboard.last_pressed, 0xF)
+
+    def test_key_uses_low_nibble(self):
+        keyboard = KeyBoard()
+        keyboard.press(0x3)
+        self.assertTrue(keyboard.key_pressed(0x3))
+        self.assertTrue(keyboard.key_pressed(0xF3))
+        self.assertFalse(keyboard.key_pressed(0xF4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from array import array
+from pathlib import Path
+from emulator.InputRecorder import InputRecorder
+from emulator.KeyBoard import KeyBoard
+from emulator.MovieInput import MovieInput, read_movie, write_movie
+from emulator.ScriptedInput import ScriptedInput
+
+
+class MovieInputTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "test.movie"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        states = array("H", [0, 1, 0x8000, 0xFFFF, 0x1234, 0])
+        write_movie(self.path, states)
+        self.assertEqual(read_movie(self.path), states)
+
+    def test_empty_movie(self):
+        write_movie(self.path, array("H"))
+        self.assertEqual(len(read_movie(self.path)), 0)
+
+    def test_replays_a_recording(self):
+        recorder = InputRecorder(ScriptedInput([(1, 4, 2), (2, 0xF, 3)]))
+        keyboard = KeyBoard(recorder)
+        for _ in range(8):
+            keyboard.poll()
+        recorder.save(self.path)
+
+        movie = MovieInput(self.path)
+        keyboard = KeyBoard(movie)
+        replayed = []
+        while not movie.finished():
+            keyboard.poll()
+            replayed.append(keyboard.get_state())
+        self.assertEqual(replayed, list(recorder.states))
+        self.assertEqual(replayed[:5], [0, 1 << 4, 1 << 4 | 1 << 0xF, 1 << 0xF, 1 << 0xF])
+
+    def test_rejects_truncated_movie(self):
+        write_movie(self.path, array("H", range(10)))
+        self.path.write_bytes(self.path.read_bytes()[:-2])
+        with self.assertRaises(AssertionError):
+            read_movie(self.path)
+
+    def test_rejects_other_files(self):
+        self.path.write_bytes(b"C8SS" + bytes(16))
+        with self.assertRaises(AssertionError):
+            read_movie(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from pathlib import Path
+from typing import List
+from emulator.Chip8 import Chip8, create_display, decode_table
+from emulator.QuirkProfile import DEFAULT_PROFILE, PROFILES, QuirkProfile
+from emulator.Rom import Rom
+
+ROMS_DIRECTORY = Path(__file__).resolve().parents[2] / "roms"
+
+
+# Runs a program of opcodes from the start of memory, one step per opcode.
+def run(profile_name: str, opcodes: List[int]) -> Chip8:
+    profile = PROFILES[profile_name]
+    chip8 = Chip8(create_display(profile), seed=0, profile=profile)
+    program = b"".join(opcode.to_bytes(2, "big") for opcode in opcodes)
+    chip8.memory.write(0x200, program)
+    chip8.rom_length = len(program)
+    for _ in opcodes:
+        chip8.step()
+    return chip8
+
+
+class QuirkProfileTest(unittest.TestCase):
+    def test_shift(self):
+        # V1 = 0x03, V2 = 0x80, then V1 >>= 1 or V1 = V2 >> 1.
+        program = [0x6103, 0x6280, 0x8126]
+        chip8 = run(DEFAULT_PROFILE, program)
+        self.assertEqual((chip8.cpu.v[1], chip8.cpu.v[0xF]), (0x01, 1))
+        chip8 = run("vip", program)
+        self.assertEqual((chip8.cpu.v[1], chip8.cpu.v[0xF]), (0x40, 0))
+
+    def test_logic_flag(self):
+        # VF = 1, V1 |= V2.
+        program = [0x6F01, 0x6103, 0x6204, 0x8121]
+        self.assertEqual(run(DEFAULT_PROFILE, program).cpu.v[0xF], 1)
+        chip8 = run("vip", program)
+        self.assertEqual((chip8.cpu.v[1], chip8.cpu.v[0xF]), (0x07, 0))
+
+    def test_load_store_index(self):
+        # I = 0x300, store V0..V2.
+        program = [0x6011, 0x6122, 0x6233, 0xA300, 0xF255]
+        chip8 = run(DEFAULT_PROFILE, program)
+        self.assertEqual(chip8.cpu.index, 0x300)
+        self.assertEqual(bytes(chip8.memory.read(0x300, 3)), b"\x11\x22\x33")
+        self.assertEqual(run("vip", program).cpu.index, 0x303)
+
+    def test_jump(self):
+        # V0 = 0x10, V3 = 0x20, jump to 0x300 plus a register.
+        program = [0x6010, 0x6320, 0xB300]
+        self.assertEqual(run(DEFAULT_PROFILE, program).cpu.program_counter, 0x310)
+        self.assertEqual(run("chip48", program).cpu.program_counter, 0x320)
+        self.assertEqual(run("schip", program).cpu.program_counter, 0x320)
+
+    def test_tables_share_unaffected_opcodes(self):
+        default = decode_table(PROFILES[DEFAULT_PROFILE])
+        vip = decode_table(PROFILES["vip"])
+        self.assertIs(decode_table(PROFILES["vip"]), vip)
+        self.assertEqual(default[0x6123], vip[0x6123])
+        self.assertIsNot(default[0x8126][0], vip[0x8126][0])
+
+    def test_profile_of_rom(self):
+        self.assertEqual(QuirkProfile.for_rom(Rom(ROMS_DIRECTORY / "BLINKY")).name, "chip48")
+        self.assertEqual(QuirkProfile.for_rom(Rom(ROMS_DIRECTORY / "BRIX")).name, DEFAULT_PROFILE)
+
+
+if __name__ == "__main__":
+    unittest.main()
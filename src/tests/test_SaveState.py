@@ -0,0 +1,69 @@
+import struct
+import unittest
+import zlib
+from pathlib import Path
+from emulator.Chip8 import Chip8, create_display
+from emulator.QuirkProfile import DEFAULT_PROFILE, PROFILES
+from emulator.Rom import Rom
+from emulator.SaveState import HEADER, SAVE_STATE_MAGIC, SAVE_STATE_VERSION, InvalidSaveStateError, SaveState
+
+ROM_PATH = Path(__file__).resolve().parents[2] / "roms" / "BRIX"
+
+
+def create_machine(profile_name: str = DEFAULT_PROFILE) -> Chip8:
+    profile = PROFILES[profile_name]
+    chip8 = Chip8(create_display(profile), seed=0, profile=profile)
+    chip8.load_rom(Rom(ROM_PATH))
+    return chip8
+
+
+class SaveStateTest(unittest.TestCase):
+    def test_round_trip(self):
+        chip8 = create_machine()
+        for _ in range(2000):
+            chip8.step()
+        state = SaveState.from_bytes(SaveState.capture(chip8).to_bytes())
+        program_counter = chip8.cpu.program_counter
+        framebuffer = chip8.display.to_bytes()
+
+        other = create_machine()
+        state.restore(other)
+        self.assertEqual(other.cpu.program_counter, program_counter)
+        self.assertEqual(other.display.to_bytes(), framebuffer)
+        self.assertEqual(SaveState.capture(other).payload, state.payload)
+
+        # Both machines carry on alike from the restored state.
+        for _ in range(500):
+            chip8.step()
+            other.step()
+        self.assertEqual(SaveState.capture(other).payload, SaveState.capture(chip8).payload)
+
+    def test_rejects_bad_checksum(self):
+        data = bytearray(SaveState.capture(create_machine()).to_bytes())
+        data[HEADER.size + 20] ^= 0xFF
+        with self.assertRaisesRegex(InvalidSaveStateError, "checksum"):
+            SaveState.from_bytes(bytes(data))
+
+    def test_rejects_other_versions(self):
+        payload = SaveState.capture(create_machine()).payload
+        data = HEADER.pack(SAVE_STATE_MAGIC, SAVE_STATE_VERSION - 1, zlib.crc32(payload)) + payload
+        with self.assertRaisesRegex(InvalidSaveStateError, "version"):
+            SaveState.from_bytes(data)
+
+    def test_rejects_other_files(self):
+        with self.assertRaisesRegex(InvalidSaveStateError, "truncated"):
+            SaveState.from_bytes(b"C8")
+        with self.assertRaisesRegex(InvalidSaveStateError, "not a Chip8"):
+            SaveState.from_bytes(struct.pack("<4sHI", b"C8MV", SAVE_STATE_VERSION, 0))
+
+    def test_rejects_differently_sized_machine(self):
+        state = SaveState.capture(create_machine("xochip"))
+        chip8 = create_machine()
+        with self.assertRaisesRegex(InvalidSaveStateError, "differently sized"):
+            state.restore(chip8)
+        with self.assertRaisesRegex(InvalidSaveStateError, "differently sized"):
+            SaveState.capture(chip8).restore(create_machine("schip"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import pygame
+from pathlib import Path
+from typing import Optional
+from emulator.Display import Display
+from emulator.KeyBoard import KeyBoard, NUM_KEYS
+from emulator.Presenter import FRAME_RATE
+from emulator.PygameInput import PygameInput
+from emulator.PygameRenderer import PygameRenderer
+from emulator.StreamClient import StreamClient
+from emulator.StreamServer import DEFAULT_ADDRESS
+
+WINDOW_WIDTH = 640
+
+
+async def show(client: StreamClient, scale: Optional[int], paced: bool):
+    width, height, planes = await client.start()
+    display = Display(width, height, planes)
+    display.attach(PygameRenderer(width, height, scale or WINDOW_WIDTH // width))
+    started = asyncio.get_running_loop().time()
+
+    async for _, milliseconds, framebuffer in client.frames():
+        if paced:
+            await asyncio.sleep(started + milliseconds / 1000 - asyncio.get_running_loop().time())
+        display.load_bytes(framebuffer)
+        display.update()
+
+
+# Forwards keypad changes made in the window to the server.
+async def forward_input(client: StreamClient, stopped: asyncio.Event):
+    def handle_event(event: pygame.event.Event):
+        if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+            stopped.set()
+
+    keyboard = KeyBoard(PygameInput(handle_event))
+    state = 0
+    while not stopped.is_set():
+        keyboard.poll()
+        changed = keyboard.get_state() ^ state
+        state ^= changed
+        if client.writer is not None:
+            for key in range(NUM_KEYS):
+                if changed >> key & 1:
+                    client.send_key(key, bool(state >> key & 1))
+        await asyncio.sleep(1 / FRAME_RATE)
+
+
+async def watch(args):
+    if args.play is not None:
+        client = StreamClient.open_file(args.play)
+    else:
+        client = await StreamClient.connect(args.address)
+
+    recording = args.save.open("wb") if args.save is not None else None
+    if recording is not None:
+        client.record(recording)
+
+    stopped = asyncio.Event()
+    viewer = asyncio.create_task(show(client, args.scale, args.play is not None))
+    closing = asyncio.create_task(stopped.wait())
+    input_task = asyncio.create_task(forward_input(client, stopped))
+    try:
+        await asyncio.wait([viewer, closing], return_when=asyncio.FIRST_COMPLETED)
+        if viewer.done():
+            # Raises if the stream was invalid.
+            viewer.result()
+    finally:
+        stopped.set()
+        viewer.cancel()
+        await input_task
+        client.close()
+        if recording is not None:
+            recording.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch, and play, a session streamed by serve.py")
+    parser.add_argument("address", nargs="?", default=DEFAULT_ADDRESS, help="host:port or unix:/path/to/socket of the server")
+    parser.add_argument("--save", type=Path, help="also save the stream to this file")
+    parser.add_argument("--play", type=Path, help="play a saved stream instead of connecting")
+    parser.add_argument("--scale", type=int, help="window pixels per Chip8 pixel, by default the window is 640 pixels wide")
+    args = parser.parse_args()
+
+    pygame.init()
+    asyncio.run(watch(args))
+
+
+if __name__ == "__main__":
+    main()